@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
-from data_fetcher import DataReaderMt,DataReaderGT,read_target_audience
-from utils import slugify
+from utils import kpi,to_keys
 import plotly.graph_objects as go
-from services import fetch_report,run_backend_sync
+from data_fetcher import get_geo_registry,load_demographic_index
+from services import fetch_report,run_backend_sync,load_page_data,get_static_assets,get_cache_warmer,get_freshness_monitor,PWANI_TABLES
+from services import geo_rollup,rollup_version,fits_client_cube,map_cube,choropleth_map,kpi_cube,kpi_version,distributor_ranking,rtm_by_territory,unmatched_locations,card_list,COMPETITOR_TABLES
+from services import market_discovery_index,content_generation_index,filter_index_version,cascade_payload
+from config import engine_stats
 import json
 import base64
 
@@ -21,6 +24,55 @@ def check_credentials(username, password):
     }
     return username in valid_users and valid_users[username] == password
 
+def warmup_status(status):
+    """One-line readiness note for the background cache warm-up"""
+    state = status["state"]
+    if state == "ready":
+        st.caption(f"🟢 Dashboards ready (data cached in {status['seconds']}s)")
+    elif state == "warming":
+        st.caption(f"🟡 Preparing dashboards… {status['done']}/{status['total']}")
+    elif state == "partial":
+        st.caption(f"🟠 Dashboards partly ready; {len(status['failed'])} dataset(s) will load on first use")
+
+@st.fragment(run_every=2)
+def warmup_progress():
+    """Poll the warm-up while it runs, then rerun once to settle on the final status"""
+    status = get_cache_warmer().status()
+    warmup_status(status)
+    if status["state"] != "warming":
+        st.rerun()
+
+# Sidebar filters of the detail page: dimension -> (widget key, label of "all values")
+DETAIL_FILTERS = {
+    "category": ("detail_category", "All Categories"),
+    "brandName": ("detail_brand", "All Brands"),
+    "territory": ("detail_territory", "All Markets"),
+}
+
+def set_detail_filters(filters):
+    """Select `filters` ({dimension: value}, None = all) in the detail page's sidebar.
+    Dimensions left out keep their selection; a value the sidebar does not offer falls back to all."""
+    for dim, value in filters.items():
+        key, all_label = DETAIL_FILTERS[dim]
+        st.session_state[key] = all_label if value is None else value
+
+def follow_map_filters(key):
+    """Carry the filters picked inside map `key` over to the sidebar, so the whole page follows the map"""
+    value = st.session_state[key]
+    if value and value.get("filters"):
+        set_detail_filters(value["filters"])
+
+def open_brand_detail(key, rows):
+    """Open the detail page on the brand picked in the pill row `key` of a brand list"""
+    picked = st.session_state[key]
+    st.session_state[key] = None
+    if picked is None:
+        return
+    row = rows[picked]
+    st.session_state.selected_brand = {"name": row["brandName"], "score": row["whiteSpaceScore"]}
+    st.session_state.prefilters = {"brandName": row["brandName"], "category": row["category"], "market": row["market"]}
+    st.session_state.page = "detail"
+
 def login_page():
     """Display login form with modern design"""
     st.set_page_config(
@@ -184,6 +236,11 @@ def login_page():
                 st.error('❌ Invalid username or password')
         
         st.markdown('</div>', unsafe_allow_html=True)
+        status = get_cache_warmer().status()
+        if status["state"] == "warming":
+            warmup_progress()
+        else:
+            warmup_status(status)
         # st.markdown('</div></div>', unsafe_allow_html=True)
     with col3:
         st.markdown('</div></div>', unsafe_allow_html=True)
@@ -203,74 +260,10 @@ def main_app():
 
     MAP_CENTER = {"lat": -0.5, "lon": 36.5}
     MAP_ZOOM = 4
-
-    gt_reader = DataReaderGT()
-    mt_reader = DataReaderMt()
-
-    @st.cache_data(show_spinner=True)
-    def load_rtm_data():
-        try:
-            gt_fetcher = DataReaderGT()  
-            rtm_data = gt_fetcher.read_rtm_data()
-            return rtm_data
-        except Exception as e:
-            st.warning(f"⚠️ Failed to load RTM data due to: {e}. Please try again.")
-            return None
-
-
-    @st.cache_data(show_spinner=False)
-    def load_brand_data(data):
-        """Load brand data with expected columns: brandName, category, market, marketShare, competitorStrength, whiteSpaceScore"""
-        try:
-            if data == 'MT':
-                df = mt_reader.read_mt_pwani_data()
-            elif data == "GT":
-                df = gt_reader.read_gt_pwani_data()
-            else:
-                raise ValueError("Invalid data type. Expected 'MT' or 'GT'.")
-            return df
-        except Exception as e:
-            st.warning(f"⚠️ Could not load brand data ({data}). Error: {e}. Please try again.")
-            return None
-
-
-    @st.cache_data(show_spinner=False)
-    def load_competitor_data(data):
-        """Load competitor data for MT or GT"""
-        try:
-            if data == 'MT':
-                df = mt_reader.read_mt_competitor_data()
-            elif data == "GT":
-                df = gt_reader.read_gt_competitor_data()
-            else:
-                raise ValueError("Invalid data type. Expected 'MT' or 'GT'.")
-            return df
-        except Exception as e:
-            st.warning(f"⚠️ Failed to load competitor data ({data}). Error: {e}. Please try again.")
-            return None
-
-
-    @st.cache_data(show_spinner=True)
-    def load_gt_data():
-        try:
-            gt_fetcher = DataReaderGT()
-            gt_data = gt_fetcher.read_gt_pwani_data()
-            return gt_data
-        except Exception as e:
-            st.warning(f"⚠️ Could not load GT data due to: {e}. Please try again.")
-            return None
-    @st.cache_data(show_spinner=True)
-    def load_target_audience():
-        try:
-            df=read_target_audience()
-            return df
-        except Exception as e:
-            st.warning(f"⚠️ Could not load GT data due to: {e}. Please try again.")
-            
-
-
-    
-    
+    # plotly.js and boundary topologies are served from static/ under content-hashed URLs
+    assets = get_static_assets()
+    # Data location names are matched to polygons through their canonical keys
+    registry = get_geo_registry()
 
     def markdown_container(color,container_name,score,dist_factor,span):  
         mk=st.markdown(f"""
@@ -437,10 +430,24 @@ def main_app():
     if st.sidebar.button("Logout", use_container_width=True):
         logout()
 
-
-    rtm_data=load_rtm_data()
-    BRAND_DF = load_brand_data(data)
-    COMP_DF=load_competitor_data(data)
+    with st.sidebar.expander("Database pool"):
+        st.json(engine_stats())
+
+
+    # Each page only loads the columns it declares in data_fetcher.contracts;
+    # the summary page reads SQL aggregates instead of raw rows. Everything a
+    # page needs is loaded concurrently, so it waits only for the slowest query.
+    # Cache entries are keyed on the freshness monitor's table versions, so new
+    # rows in MySQL reload only the datasets built from the changed tables.
+    # The versions are read once per run: every cache below is keyed on the
+    # versions of the frames it is built from, even if the probe moves on.
+    view = st.session_state.page
+    freshness = get_freshness_monitor()
+    versions = freshness.versions()
+    loaded = load_page_data(view, data, versions)
+    rtm_data = loaded.get("rtm")
+    BRAND_DF = loaded.get("brand")
+    COMP_DF = loaded.get("competitor")
 
     # -------------------- Summary Page --------------------
     if st.session_state.page == "summary":
@@ -487,37 +494,25 @@ def main_app():
 
         
         st.subheader("Key Performance Indicators")
-        date=BRAND_DF["date"].max().strftime("%b %Y")
-        st.write(f"Last Update {date}")
-        agg_data = BRAND_DF.groupby(['brandName','category','market']).agg({
-            'whiteSpaceScore':'mean',
-            'marketShare':'sum',
-            'competitorStrength':'sum'
-        }).reset_index()
+        summary = loaded["summary"]
+        if summary is None:
+            st.stop()
+        date=summary["last_update"].strftime("%b %Y")
+        watermark = versions.get(PWANI_TABLES[data], {}).get("watermark")
+        if watermark is not None:
+            st.write(f"Last Update {date} · data through {watermark:%d %b %Y}")
+        else:
+            st.write(f"Last Update {date}")
+        agg_data = summary["brand_rollup"]
         
         avg_ws_score = agg_data['whiteSpaceScore'].mean()
         total_brands = len(agg_data[['brandName','category']].drop_duplicates())
         total_markets = len(agg_data['market'].unique())
        
 
-            
-        if data=="MT":
-            
-            grouped_df = COMP_DF.groupby('brandName')['totalQuantity'].sum().reset_index()
-            top_3_sales = grouped_df['totalQuantity'].sort_values(ascending=False).head(3).sum()
-            cci = (top_3_sales / grouped_df['totalQuantity'].sum()) * 100
-            tMshare_p = BRAND_DF['quantity'].sum()
-            tMshare_c= COMP_DF['quantity'].sum()
-            market_share=(tMshare_p/(tMshare_c+tMshare_p))*100
-
-
-        elif data =="GT":
-            grouped_df = COMP_DF.groupby('brandName')['brandTotalVolume'].sum().reset_index()
-            top_3_sales = grouped_df['brandTotalVolume'].sort_values(ascending=False).head(3).sum()
-            cci = (top_3_sales / grouped_df['brandTotalVolume'].sum()) * 100
-            tMshare_p = sum(BRAND_DF['brandTotalVolume'].unique())
-            tMshare_c= sum(COMP_DF['brandTotalVolume'].unique())
-            market_share=(tMshare_p/(tMshare_c+tMshare_p))*100
+        # Competitor concentration: share of the top 3 competitor brands
+        cci = kpi.concentration(summary["competitor_volume"]['volume'])
+        market_share = summary["market_share"]
                 
 
         c1, c2, c3 = st.columns(3)
@@ -527,7 +522,7 @@ def main_app():
 
         with c2:
             span_message="Percentage of total market sales captured by your brand."
-            markdown_container('purple','Market Share',market_share.round(1),total_markets,span_message)
+            markdown_container('purple','Market Share',round(market_share,1),total_markets,span_message)
         
         with c3:
             span_message="% of top 3 competitors’ sales. Lower (≤50%) = fragmented market, more opportunity."
@@ -546,40 +541,30 @@ def main_app():
       
             st.markdown("**Kenya Brand Performance Data**")
             if data=='GT':
-                with open("storage/kenya_territories_lake.geojson") as f:
-                    geo = json.load(f)
+                geo_name = "territories"
                 feautre_id="properties.TERRITORY"
           
             elif data =="MT":
-                with open("storage/kenya.geojson") as f:
-                    geo= json.load(f)
+                geo_name = "counties"
                 feautre_id="properties.COUNTY_NAM"
-            metric = BRAND_DF.groupby("market", as_index=False).agg({'whiteSpaceScore': 'mean','marketShare': 'mean'}).reset_index()
-
+            geo = assets.topology(geo_name, zoom=MAP_ZOOM)
+            metric = summary["market_metrics"]
 
-            metrics = {
-                "WSS": list(metric["whiteSpaceScore"].unique()),
-                "MS": list(metric["marketShare"])
-            }
 
-            colorbar_titles = {
-            "WSS": "WSS",
-            "MS": "MS"
+            # z comes from the layer picked in the map menu
+            layers = {
+                "WSS": {"label": "White Space Score", "trace": {"z": metric["whiteSpaceScore"], "colorbar.title.text": "WSS"}},
+                "MS": {"label": "Market Share", "trace": {"z": metric["marketShare"], "colorbar.title.text": "MS"}},
             }
-            default_metric = "WSS"
-    
 
             fig_prov = go.Figure(go.Choroplethmapbox(
-                geojson=geo,
                 featureidkey=feautre_id,
-                locations=metric["market"],
-                z=metrics[default_metric],
+                locations=registry.locations(geo_name, metric["market"]),
                 colorscale="Viridis",
                 marker_opacity=0.7,
                 marker_line_width=0.5,
                 text=metric["market"],  # hover name
                 hovertemplate="<b>%{text}</b><br>Score: %{z}<extra></extra>",
-                colorbar=dict(title=colorbar_titles[default_metric])
             ))
 
             fig_prov.update_layout(
@@ -590,178 +575,32 @@ def main_app():
                 margin=dict(r=0, t=0, l=0, b=0)
             )
 
-            fig_json = fig_prov.to_json()
-
-
-            html = f"""
-            <style>
-            .wrap {{
-                position: relative;
-                height: 400px;
-                border-radius: 16px;
-                overflow: hidden;
-                background: #eef2f7;
-                border: 1px solid #e5e7eb;
-                box-shadow: 0 12px 28px rgba(0,0,0,.08);
-            }}
-            #plotA {{
-                position: absolute;
-                inset: 0;
-            }}
-            .fab {{
-                position: absolute;
-                top: 25px;
-                right: 12px;
-                z-index: 10;
-                width: 44px;
-                height: 44px;
-                border-radius: 50%;
-                border: none;
-                background: #fff;
-                box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                font: 700 18px/44px system-ui, sans-serif;
-                cursor: pointer;
-            }}
-            .menu {{
-                position: absolute;
-                top: 60px;
-                right: 12px;
-                z-index: 11;
-                width: 180px;
-                background: #fff;
-                border-radius: 12px;
-                box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                border: 1px solid #eef0f4;
-                display: none;
-            }}
-            .menu.open {{
-                display: block;
-            }}
-            .menu div {{
-                padding: 10px;
-                cursor: pointer;
-                border-bottom: 1px solid #e5e5e5;
-            }}
-            .menu div:last-child {{
-                border-bottom: none;
-            }}
-            .menu div:hover {{
-                background: #f3f6fb;
-            }}
-        .item{{ padding:10px 14px; cursor:pointer; font:500 14px/1.2 system-ui, sans-serif;}} .item:hover{{ background:#f3f6fb; }}
-
-            </style>
-
-            <div class="wrap">
-                <div id="plotA"></div>
-                <button id="fabA" class="fab">☰</button>
-                <div id="menuA" class="menu">
-                    <div class="item" data-metric="WSS">White Space Score</div>
-                    <div class="item" data-metric="MS">Market Share</div>
-                </div>
-            </div>
-
-            <script src="https://cdn.plot.ly/plotly-2.32.0.min.js"></script>
-            <script>
-                const fig = {fig_json};
-                const METRICS = {json.dumps(metrics)};
-                const COLORBARS = {json.dumps(colorbar_titles)};
-                const div = document.getElementById("plotA");
-                Plotly.newPlot(div, fig.data, fig.layout, {{responsive:true, displayModeBar:false}});
-
-                const fab = document.getElementById("fabA");
-                const menu = document.getElementById("menuA");
-
-                fab.addEventListener("click", () => {{
-                    menu.classList.toggle("open");
-                }});
-
-                document.querySelectorAll(".item").forEach(el => {{
-                    el.addEventListener("click", () => {{
-                        const metric = el.dataset.metric;
-                        Plotly.restyle(div, {{z: [METRICS[metric]]}}, [0]);
-                        Plotly.restyle(div, {{
-                                z: [METRICS[metric]],
-                'colorbar.title.text': COLORBARS[metric]
-                        }}, [0]);
-                        menu.classList.remove("open");
-                    }});
-                }});
-            </script>
-            """
-
-            st.components.v1.html(html, height=420, scrolling=False)
+            clicked = (choropleth_map(fig_prov, geo, key="summary-map", layers=layers, layer="WSS") or {}).get("click")
+            if clicked:
+                picked = metric[metric["market"] == clicked["name"]]
+                if not picked.empty:
+                    st.caption(
+                        f"**{clicked['name']}** · White Space Score {picked['whiteSpaceScore'].iloc[0]:.1f} · "
+                        f"Market Share {picked['marketShare'].iloc[0]:.1f}"
+                    )
             
         with col2:
-            with open("storage/kenya.geojson") as f:
-                geo= json.load(f)
-                feautre_id="properties.COUNTY_NAM"
+            geo = assets.topology("counties", zoom=MAP_ZOOM)
+            feautre_id="properties.COUNTY_NAM"
             st.markdown("**Kenya – Demographic Index**")
-            metrics=pd.read_csv('storage/demographic_data.csv')    
-            metrics = metrics.to_dict(orient="list")
-
-       
-            colorbar_titles = {
-    "WSS": "WSS",
-    "MS": "MS",
-    "GDP": "GDP",
-    "POP": "POP",
-    "MPOP": "MPOP",
-    "FPOP": "FPOP",
-    "HH": "HH",
-    "AREA": "AREA",
-    "DENSITY": "DENSITY",
-    "PCI": "PCI",
-    "STUDENTS": "STUDENTS",
-    "HDI": "HDI",
-    "AGRI": "AGRI",
-    "MINING": "MINING",
-    "MANUF": "MANUF",
-    "ELEC": "ELEC",
-    "WATER": "WATER",
-    "CONST": "CONST",
-    "RETAIL": "RETAIL",
-    "TRANS": "TRANS",
-    "ACCOM": "ACCOM",
-    "INFO": "INFO",
-    "FIN": "FIN",
-    "ESTATE": "ESTATE",
-    "PROF": "PROF",
-    "ADMIN": "ADMIN",
-    "PUBLIC": "PUBLIC",
-    "EDU": "EDU",
-    "HEALTH": "HEALTH",
-    "OTHER": "OTHER",
-    "FISM": "FISM",
-    "GCP": "GCP",
-    "INTERNET": "INTERNET",
-    "CATH": "CATH",
-    "PROT": "PROT",
-    "EVAN": "EVAN",
-    "AIC": "AIC",
-    "ORTH": "ORTH",
-    "OTHREL": "OTHREL",
-    "MUSLIM": "MUSLIM",
-    "POV": "POV",
-    "PURCH": "PURCH",
-    "OWN": "OWN",
-    "GIFT": "GIFT",
-    "ELEC_ACC": "ELEC_ACC",
-    "SANIT": "SANIT"
-}
-
+            # Parsed once per process; the browser fetches every metric once as float32 arrays
+            demographics = load_demographic_index()
             default_metric = "Total Population"
+            _, _, default_scale, default_format = demographics.metrics[default_metric]
             
             fig = go.Figure(go.Choroplethmapbox(
-            geojson=geo,
                 featureidkey="properties.COUNTY_NAM",
-                locations=metrics["Location"],
-                z=metrics["Total Population"],
-                colorscale="Viridis",
+                locations=registry.locations("counties", demographics.locations),
+                colorscale=default_scale,
                 marker_opacity=0.7,
                 marker_line_width=0.5,
-                text=metrics["Location"],  # hover name
-                hovertemplate="<b>%{text}</b><br>Score: %{z}<extra></extra>"
+                text=demographics.locations,  # hover name
+                hovertemplate="<b>%{text}</b><br>%{z:" + default_format + "}<extra></extra>",
                 ))
  
             fig.update_layout(
@@ -772,193 +611,9 @@ def main_app():
                 margin=dict(r=0, t=0, l=0, b=0)
            
             )
-            
-      
 
-            # Convert Plotly figure to JSON
-            fig_json = fig.to_json()
-
-            # Minimal HTML with floating hamburger
-            html = f"""
-            <style>
-            .wrap {{
-                position: relative;
-                height: 400px;
-                border-radius: 16px;
-                overflow: hidden;
-                background: #eef2f7;
-                border: 1px solid #e5e7eb;
-                box-shadow: 0 12px 28px rgba(0,0,0,.08);
-            }}
-            #plotA {{
-                position: absolute;
-                inset: 0;
-            }}
-            .fab {{
-                position: absolute;
-                top: 25px;
-                right: 12px;
-                z-index: 10;
-                width: 44px;
-                height: 44px;
-                border-radius: 50%;
-                border: none;
-                background: #fff;
-                box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                font: 700 18px/44px system-ui, sans-serif;
-                cursor: pointer;
-            }}
-            .menu {{
-                position: absolute;
-                top: 60px;
-                right: 12px;
-                z-index: 11;
-                width: 180px;
-                background: #fff;
-                border-radius: 12px;
-                box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                border: 1px solid #eef0f4;
-                display: none;
-                overflow-y: auto;
-                max-height: 250px;
-            }}
-            .menu.open {{
-                display: block;
-            }}
-            .menu div {{
-                padding: 10px;
-                cursor: pointer;
-                border-bottom: 1px solid #e5e5e5;
-            }}
-            .menu div:last-child {{
-                border-bottom: none;
-            }}
-            .menu div:hover {{
-                background: #f3f6fb;
-            }}
-        .item{{ padding:10px 14px; cursor:pointer; font:500 14px/1.2 system-ui, sans-serif;}} .item:hover{{ background:#f3f6fb; }}
-
-            </style>
-
-            <div class="wrap">
-                <div id="plotA"></div>
-                <button id="fabA" class="fab">☰</button>
-                <div id="menuA" class="menu">
-  <div class="item" data-metric="GDP 2022">GDP 2022</div>
-  <div class="item" data-metric="Total Population">Total Population</div>
-  <div class="item" data-metric="Male Population">Male Population</div>
-  <div class="item" data-metric="Female population">Female population</div>
-  <div class="item" data-metric="Households-Total">Households-Total</div>
-  <div class="item" data-metric="Sq Km">Sq Km</div>
-  <div class="item" data-metric="Persons per Sq. Km">Persons per Sq. Km</div>
-  <div class="item" data-metric="PCI 2022">PCI 2022</div>
-  <div
-    class="item"
-    data-metric="number of students enrolled in secondary schools"
-  >
-    number of students enrolled in secondary schools
-  </div>
-  <div class="item" data-metric="HDI">HDI</div>
-  <div class="item" data-metric="Agriculture, Forestry & Fishing">
-    Agriculture, Forestry & Fishing
-  </div>
-  <div class="item" data-metric="Mining & Quarrying">Mining & Quarrying</div>
-  <div class="item" data-metric="Manufacturing">Manufacturing</div>
-  <div class="item" data-metric="Electricity Supply">Electricity Supply</div>
-  <div class="item" data-metric="Water Supply; Waste Collection">
-    Water Supply; Waste Collection
-  </div>
-  <div class="item" data-metric="Construction">Construction</div>
-  <div class="item" data-metric="Wholesale & Retail (Motor Repair)">
-    Wholesale & Retail (Motor Repair)
-  </div>
-  <div class="item" data-metric="Transport & Storage">Transport & Storage</div>
-  <div class="item" data-metric="Accommodation & Food Service">
-    Accommodation & Food Service
-  </div>
-  <div class="item" data-metric="Information & Communication">
-    Information & Communication
-  </div>
-  <div class="item" data-metric="Financial & Insurance Activities">
-    Financial & Insurance Activities
-  </div>
-  <div class="item" data-metric="Real Estate Activities">
-    Real Estate Activities
-  </div>
-  <div class="item" data-metric="Professional & Technical Services">
-    Professional & Technical Services
-  </div>
-  <div class="item" data-metric="Administrative Support Services">
-    Administrative Support Services
-  </div>
-  <div class="item" data-metric="Public Administration & Defense">
-    Public Administration & Defense
-  </div>
-  <div class="item" data-metric="Education">Education</div>
-  <div class="item" data-metric="Human Health & Social Work">
-    Human Health & Social Work
-  </div>
-  <div class="item" data-metric="Other Service Activities">
-    Other Service Activities
-  </div>
-  <div class="item" data-metric="Financial Services Indirectly Measured">
-    Financial Services Indirectly Measured
-  </div>
-  <div class="item" data-metric="GCP">GCP</div>
-  <div class="item" data-metric="Internet Penetration">
-    Internet Penetration
-  </div>
-  <div class="item" data-metric="Catholic">Catholic</div>
-  <div class="item" data-metric="Protestant">Protestant</div>
-  <div class="item" data-metric="Evangelicals">Evangelicals</div>
-  <div class="item" data-metric="AIC">AIC</div>
-  <div class="item" data-metric="Orthodox">Orthodox</div>
-  <div class="item" data-metric="Others">Others</div>
-  <div class="item" data-metric="Muslims">Muslims</div>
-  <div class="item" data-metric="Poverty">Poverty</div>
-  <div class="item" data-metric="Purchase Stock (%)">Purchase Stock (%)</div>
-  <div class="item" data-metric="Own Production (%)">Own Production (%)</div>
-  <div class="item" data-metric="Gifts (%)">Gifts (%)</div>
-  <div class="item" data-metric="electricity access Percentage">
-    electricity access Percentage
-  </div>
-  <div class="item" data-metric="access to sanitation">
-    access to sanitation
-  </div>
-</div>
-
-            </div>
-
-            <script src="https://cdn.plot.ly/plotly-2.32.0.min.js"></script>
-            <script>
-                const fig = {fig_json};
-                const METRICS = {json.dumps(metrics)};
-                const COLORBARS = {json.dumps(colorbar_titles)};
-                const div = document.getElementById("plotA");
-                Plotly.newPlot(div, fig.data, fig.layout, {{responsive:true, displayModeBar:false}});
-
-                const fab = document.getElementById("fabA");
-                const menu = document.getElementById("menuA");
-
-                fab.addEventListener("click", () => {{
-                    menu.classList.toggle("open");
-                }});
-
-                document.querySelectorAll(".item").forEach(el => {{
-                    el.addEventListener("click", () => {{
-                        const metric = el.dataset.metric;
-                        Plotly.restyle(div, {{z: [METRICS[metric]]}}, [0]);
-                        Plotly.restyle(div, {{
-                                z: [METRICS[metric]],
-                'colorbar.title.text': COLORBARS[metric]
-                        }}, [0]);
-                        menu.classList.remove("open");
-                    }});
-                }});
-            </script>
-            """
-
-            st.components.v1.html(html, height=420, scrolling=False)
+            # Every metric is a layer fetched once per browser as float32 arrays
+            choropleth_map(fig, geo, key="demographic-map", layers_url=assets.demographics(), layer=default_metric)
 
 
         st.markdown("---")
@@ -969,76 +624,24 @@ def main_app():
         top_brands = agg_data.nsmallest(5, 'whiteSpaceScore').sort_values('whiteSpaceScore', ascending=True)
         bottom_brands = agg_data.nlargest(5, 'whiteSpaceScore').sort_values('whiteSpaceScore', ascending=False)
 
+        # Each list is one cached HTML block; one pill row per list opens a brand in the detail page
         c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("**🏆 Top Performing Brands**")
-            for idx, row in top_brands.iterrows():
-                unique_key = f"top_{idx}_{slugify(row['brandName'])}_{slugify(row['market'])}"
-                
-                if st.button(f"{row['brandName']} - WS Score: {row['whiteSpaceScore']:.1f} %", 
-                            key=unique_key):
-                    st.session_state.selected_brand = {
-                        "name": row["brandName"], 
-                        "score": row["whiteSpaceScore"]
-                    }
-                    st.session_state.prefilters = {
-                        "brandName": row["brandName"],
-                        "category": row["category"],
-                        "market": row["market"]
-                    }
-                    st.session_state.page = "detail"
-                    st.rerun()
-                    
-                st.markdown(f"""
-                            <style>
-                            .brand-card{{
-                                padding:10px !important;
-                                background: #eee;
-                            }}
-                            </style>
-                <div class="brand-card">
-                    <strong>{row['brandName']} {row['category']}</strong> - <em>{row['market']}</em> | 
-                    Category: {row['category']}<br>
-                    White Space Score: <strong>{row['whiteSpaceScore']:.1f}%</strong> | 
-                    Market Share: <strong>{row['marketShare']:.1f}%</strong>
-                    <div style="background: #E5E7EB; height: 8px; border-radius: 4px; margin-top: 8px;">
-                        <div style="background: linear-gradient(to right, #10B981, #059669);
-                                    height: 8px; width: {max(0,min(100,100-float(row['whiteSpaceScore'])))}%; border-radius: 4px;"></div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-        with c2:
-            st.markdown("**⚠️ Underperforming Brands**") 
-            for idx, row in bottom_brands.iterrows():
-                unique_key = f"bottom_{idx}_{slugify(row['brandName'])}_{slugify(row['market'])}"
-                
-                if st.button(f"{row['brandName']} - WS Score: {row['whiteSpaceScore']:.1f}%",
-                            key=unique_key):
-                    st.session_state.selected_brand = {
-                        "name": row["brandName"],
-                        "score": row["whiteSpaceScore"] 
-                    }
-                    st.session_state.prefilters = {
-                        "brandName": row["brandName"],
-                        "category": row["category"], 
-                        "market": row["market"]
-                    }
-                    st.session_state.page = "detail"
-                    st.rerun()
-                    
-                st.markdown(f"""
-                <div class="brand-card poor-brand-card">
-                    <strong>{row['brandName']} {row['category']}</strong> - <em>{row['market']}</em> | 
-                    Category: {row['category']}<br>
-                    White Space Score: <strong>{row['whiteSpaceScore']:.1f}%</strong> |
-                    Market Share: <strong>{row['marketShare']:.1f}%</strong>
-                    <div style="background: #E5E7EB; height: 8px; border-radius: 4px; margin-top: 8px;">
-                        <div style="background: linear-gradient(to right, #EF4444, #DC2626);
-                                    height: 8px; width: {max(0,min(100,100-float(row['whiteSpaceScore'])))}%; border-radius: 4px;"></div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        for column, title, kind, ranked in (
+            (c1, "**🏆 Top Performing Brands**", "top_brands", top_brands),
+            (c2, "**⚠️ Underperforming Brands**", "bottom_brands", bottom_brands),
+        ):
+            with column:
+                st.markdown(title)
+                st.markdown(card_list(kind, ranked), unsafe_allow_html=True)
+                rows = ranked[["brandName", "category", "market", "whiteSpaceScore"]].to_dict("records")
+                st.pills(
+                    "Open in detail",
+                    range(len(rows)),
+                    format_func=lambda i, rows=rows: f"{rows[i]['brandName']} - WS Score: {rows[i]['whiteSpaceScore']:.1f}%",
+                    key=f"{kind}_pick",
+                    on_change=open_brand_detail,
+                    args=(f"{kind}_pick", rows),
+                )
         st.markdown("</div>", unsafe_allow_html=True)
 
     elif st.session_state.page == "detail":
@@ -1057,56 +660,37 @@ def main_app():
         
    
  
+        # A brand picked on the summary page opens with its filters selected
+        if st.session_state.get("prefilters"):
+            prefilters = st.session_state.prefilters
+            set_detail_filters({
+                "category": prefilters.get("category"),
+                "brandName": prefilters.get("brandName"),
+                "territory": prefilters.get("market"),
+            })
+            st.session_state.prefilters = None
+
         if data == "MT":
             st.sidebar.markdown("---")
             st.sidebar.header("Filters & Controls")
+            show_volume = False  # RTM overlay is GT only
         
             # Category selection (first)
-            category_options = sorted(BRAND_DF["category"].dropna().unique())
+            options = market_discovery_index(data, filter_index_version(versions, data), BRAND_DF)
+            category_options = options[()]
         
-            # Check if there are prefilters from the button click
-            if "prefilters" in st.session_state and st.session_state.prefilters:
-                default_category = st.session_state.prefilters.get("category")
-                if default_category in category_options:
-                    default_category_index = category_options.index(default_category)
-                else:
-                    default_category_index = 0
-            else:
-                default_category_index = 0
-        
-            category = st.sidebar.selectbox("Select Report Category", ["All Categories"]+category_options, index=default_category_index)
+            category = st.sidebar.selectbox("Select Report Category", ["All Categories"]+category_options, key=DETAIL_FILTERS["category"][0])
         
             # Brand selection (filtered by category)
-            brand_options = sorted(BRAND_DF[BRAND_DF["category"] == category]["brandName"].dropna().unique())
-        
-            if "prefilters" in st.session_state and st.session_state.prefilters:
-                default_brand = st.session_state.prefilters.get("brandName")
-                if default_brand in brand_options:
-                    default_brand_index = brand_options.index(default_brand)
-                else:
-                    default_brand_index = 0
-            else:
-                default_brand_index = 0
+            brand_options = options.get((category,), [])
         
-            brand = st.sidebar.selectbox("Select Report Brand",['All Brands'] + brand_options, index=default_brand_index)
+            brand = st.sidebar.selectbox("Select Report Brand",['All Brands'] + brand_options, key=DETAIL_FILTERS["brandName"][0])
         
             # Territory selection (filtered by category and brand)
-            territory_options = sorted(BRAND_DF[(BRAND_DF["category"] == category) & (BRAND_DF["brandName"] == brand)]["territory"].dropna().unique())
-        
-            if "prefilters" in st.session_state and st.session_state.prefilters:
-                default_territory = st.session_state.prefilters.get("market")
-                if default_territory in territory_options:
-                    default_territory_index = territory_options.index(default_territory)
-                else:
-                    default_territory_index = 0
-            else:
-                default_territory_index = 0
+            territory_options = options.get((category, brand), [])
         
-            territory = st.sidebar.selectbox("Select Report Territory",["All Markets"]+ territory_options, index=default_territory_index)
+            territory = st.sidebar.selectbox("Select Report Territory",["All Markets"]+ territory_options, key=DETAIL_FILTERS["territory"][0])
         
-            # Clear prefilters after first use
-            if "prefilters" in st.session_state:
-                st.session_state.prefilters = None
     
         elif data == "GT":
             st.sidebar.markdown("---")
@@ -1117,124 +701,60 @@ def main_app():
 
         
             
-            # Category selection (first) - intersection logic
-            category_gt = BRAND_DF["category"].dropna().unique()
-            category_rtm = rtm_data["category"].dropna().unique()
-            category_options = sorted(set(category_gt).intersection(category_rtm))
-        
-            # Check if there are prefilters from the button click
-            if "prefilters" in st.session_state and st.session_state.prefilters:
-                default_category = st.session_state.prefilters.get("category")
-                if default_category in category_options:
-                    default_category_index = category_options.index(default_category)
-                else:
-                    default_category_index = 0
-            else:
-                default_category_index = 0
+            # Category selection (first) - intersection logic, precomputed per data version
+            options = market_discovery_index(data, filter_index_version(versions, data), BRAND_DF, rtm_data)
+            category_options = options[()]
         
-            category = st.sidebar.selectbox("Select Report Category",['All Categories']+ category_options, index=default_category_index)
+            category = st.sidebar.selectbox("Select Report Category",['All Categories']+ category_options, key=DETAIL_FILTERS["category"][0])
         
             # Brand selection (filtered by category) - intersection logic
-            brand_gt = BRAND_DF[BRAND_DF["category"] == category]["brandName"].dropna().unique()
-            brand_rtm = rtm_data[rtm_data["category"] == category]["brand"].dropna().unique()
-            brand_options = sorted(set(brand_gt).intersection(brand_rtm))
+            brand_options = options.get((category,), [])
         
-            if "prefilters" in st.session_state and st.session_state.prefilters:
-                default_brand = st.session_state.prefilters.get("brandName")
-                if default_brand in brand_options:
-                    default_brand_index = brand_options.index(default_brand)
-                else:
-                    default_brand_index = 0
-            else:
-                default_brand_index = 0
-        
-            brand = st.sidebar.selectbox("Select Report Brand", ['All Brands']+brand_options, index=default_brand_index)
+            brand = st.sidebar.selectbox("Select Report Brand", ['All Brands']+brand_options, key=DETAIL_FILTERS["brandName"][0])
         
             # Territory selection (filtered by category and brand) - intersection logic
-            gt_territory = BRAND_DF[(BRAND_DF["category"] == category) & (BRAND_DF["brandName"] == brand)]["market"].dropna().unique()
-            rtm_territories = rtm_data[(rtm_data["category"] == category) & (rtm_data["brand"] == brand)]["territory"].dropna().unique()
-            territory_options = sorted(set(gt_territory).intersection(rtm_territories))
+            territory_options = options.get((category, brand), [])
         
-            if "prefilters" in st.session_state and st.session_state.prefilters:
-                default_territory = st.session_state.prefilters.get("market")
-                if default_territory in territory_options:
-                    default_territory_index = territory_options.index(default_territory)
-                else:
-                    default_territory_index = 0
-            else:
-                default_territory_index = 0
-        
-            territory = st.sidebar.selectbox("Select Report Territory",['All Markets'] + territory_options, index=default_territory_index)
+            territory = st.sidebar.selectbox("Select Report Territory",['All Markets'] + territory_options, key=DETAIL_FILTERS["territory"][0])
         
-            # Clear prefilters after first use
-            if "prefilters" in st.session_state:
-                st.session_state.prefilters = None
-    
 
+        client_maps = st.sidebar.checkbox(
+            "Filter maps in the browser", value=False,
+            help="Load the map data once; category, brand and territory changes inside the maps then apply instantly.",
+        )
     
         st.title("Market Discovery Dashboard")
+
+        # Map metrics at every geographic level, rolled up once per data version
+        brand_rollup = geo_rollup(PWANI_TABLES[data], view, rollup_version(versions, PWANI_TABLES[data]), BRAND_DF)
+        comp_rollup = geo_rollup(COMPETITOR_TABLES[data], view, rollup_version(versions, COMPETITOR_TABLES[data]), COMP_DF)
+        rtm_rollup = geo_rollup("rtm_data_cleaned", view, rollup_version(versions, "rtm_data_cleaned"), rtm_data)
+        selected = {
+            "category": None if category == "All Categories" else category,
+            "territory": None if territory == "All Markets" else territory,
+        }
+        selected_brand = None if brand == "All Brands" else brand
+        # The maps' filter bars offer the sidebar's cascade, so what they hand back is always selectable
+        sidebar_cascade = cascade_payload(options, DETAIL_FILTERS, {**selected, "brandName": selected_brand})
       
     
-# --- Base copies ---
-        filtered_df = BRAND_DF.copy()
-        filtered_c_df = COMP_DF.copy()
-
-        # --- Apply filters (category and market for both; brand only for Pwani) ---
-        if not (
-            category == "All Categories"
-            and brand == "All Brands"
-            and territory == "All Markets"
-        ):
-            # Filter both datasets by category (if selected)
-            if category != "All Categories":
-                filtered_df = filtered_df[filtered_df["category"] == category]
-                filtered_c_df = filtered_c_df[filtered_c_df["category"] == category]
-
-            # Filter both datasets by territory/market (if selected)
-            if territory != "All Markets":
-                filtered_df = filtered_df[filtered_df["territory"] == territory]
-                filtered_c_df = filtered_c_df[filtered_c_df["territory"] == territory]
-
-            # ❗ Filter by brand **only** for Pwani data (not for competitors)
-            if brand != "All Brands":
-                filtered_df = filtered_df[filtered_df["brandName"] == brand]
+# --- Filtered KPIs: a lookup in the cube built once per data version; competitors ignore the brand filter ---
+        audience = loaded["target_audience"]
+        cube = kpi_cube(data, kpi_version(versions, data), audience is not None, BRAND_DF, COMP_DF, audience)
+        filtered = cube.get(brandName=selected_brand, **selected)
+        if filtered is None:
+            # No Pwani rows under these filters; competitor totals still apply
+            filtered = kpi.kpis(BRAND_DF, COMP_DF, data, audience, brandName=selected_brand, **selected)
 
         st.subheader("Filtered Performance Indicators")
     
-        if not filtered_df.empty:
-            ws_mean = filtered_df['whiteSpaceScore'].mean()
-
-            if pd.isna(ws_mean):
-                ws_mean = BRAND_DF['whiteSpaceScore'].mean() 
-        if data=="MT":
-            
-            
-            tMshare_p = filtered_df['quantity'].sum()
-            tMshare_c= filtered_c_df['quantity'].sum()
-            market_share=(tMshare_p/(tMshare_c+tMshare_p))*100
-
-
-        elif data =="GT":
-            
-            tMshare_p = sum(filtered_df['brandTotalVolume'].unique())
-            tMshare_c= sum(filtered_c_df['brandTotalVolume'].unique())
-            market_share=(tMshare_p/(tMshare_c+tMshare_p))*100
-                
-                
-            
-            
-
-        
-
-   
-        ped = filtered_df['ped'].mean().round(2)
-        z_score= filtered_df['brandZVol'].mean().round(2)
-        cluster = filtered_df['cluster'].iloc[0]  # first value
-        cluster = cluster.split("|")[0] if "|" in cluster else cluster
-
-        
-
-        tg_audience = load_target_audience()
+        ws_mean = filtered["whiteSpaceScore"]
+        if pd.isna(ws_mean):
+            ws_mean = cube.get()["whiteSpaceScore"]
+        market_share = filtered["marketShare"]
+        ped = round(filtered["ped"], 2)
+        z_score = round(filtered["zScore"], 2)
+        cluster = filtered["cluster"] or "N/A"
 
         import math
 
@@ -1258,36 +778,7 @@ def main_app():
                 return f"{num:.0f}"
 
 
-        if tg_audience is not None and not tg_audience.empty:
-            mask = pd.Series(True, index=tg_audience.index)
-
-            if territory != "All Markets":
-                mask &= tg_audience["market"] == territory
-            if category != "All Categories":
-                mask &= tg_audience["category"] == category
-            if brand != "All Brands":
-                mask &= tg_audience["brandName"] == brand
-
-            ta_number = tg_audience[mask]
-
-            # Step 1 & 2: Average population by market
-            avg_population_per_market = ta_number.groupby("market")["provincePopulation"].mean()
-
-
-            # Step 3: Sum of averages
-            sum_avg_population = avg_population_per_market.sum()
-  
-
-            # Step 4: Mean percent
-            mean_percent = ta_number["percentOfProvince"].mean() / 100  # convert % to decimal
-
-            # Step 5: Final target audience
-            target_au = sum_avg_population * mean_percent
-            target_au = human_format(target_au)
-
-        else:
-            ta_number = pd.DataFrame()
-            target_au = 0
+        target_au = human_format(filtered["targetAudience"])
 
         
         kc1, kc2, kc3, kc4, kc5,kc6 = st.columns(6)
@@ -1350,82 +841,71 @@ def main_app():
         with left:
 
             if data=='GT':
-                with open("storage/kenya_territories_lake.geojson") as f:
-                    geo = json.load(f)
+                geo_name, level = "territories", "territory"
+                geo = assets.topology(geo_name, zoom=MAP_ZOOM)
                 feautre_id="properties.TERRITORY"
-                if territory == "All Markets" and category == "All Categories" and brand == "All Brands":
-                    df = BRAND_DF.copy()
-                else:
-                    df = BRAND_DF[
-                        (BRAND_DF["territory"] == territory if territory != "All Markets" else True) &
-                        (BRAND_DF["category"] == category if category != "All Categories" else True) &
-                        (BRAND_DF["brandName"] == brand if brand != "All Brands" else True)
-                    ]
-                metric = df.copy()
                 if show_volume:
-                    with open("storage/kenya-subcounties-simplified.geojson") as f:
-                        geo_rtm = json.load(f)
+                    geo_rtm = assets.topology("subcounties", zoom=MAP_ZOOM)
                     feautre_id_rtm = "properties.shapeName"
-                
-                    if territory == "All Markets" and category == "All Categories" and brand == "All Brands":
-                        df_rtm = rtm_data.copy()
-                    else:
-                        df_rtm = rtm_data[
-                            (rtm_data["territory"] == territory if territory != "All Markets" else True) &
-                            (rtm_data["category"] == category if category != "All Categories" else True) &
-                            (rtm_data["brand"] == brand if brand != "All Brands" else True)
-                        ]
-                    metric_rtm = df_rtm.copy()
+                    metric_rtm = rtm_rollup.slice("subcounty", brand=selected_brand, **selected)
 
-
-                
             elif data =="MT":
-                with open("storage/kenya.geojson") as f:
-                    geo= json.load(f)
+                geo_name, level = "counties", "county"
+                geo = assets.topology(geo_name, zoom=MAP_ZOOM)
                 feautre_id="properties.COUNTY_NAM"
-                if territory == "All Markets" and category == "All Categories" and brand == "All Brands":
-                    df = BRAND_DF.copy()
-                else:
-                    df = BRAND_DF[
-                        (BRAND_DF["territory"] == territory if territory != "All Markets" else True) &
-                        (BRAND_DF["category"] == category if category != "All Categories" else True) &
-                        (BRAND_DF["brandName"] == brand if brand != "All Brands" else True)
-                    ]
-                metric = df.groupby("market", as_index=False).agg({'whiteSpaceScore': 'mean','marketShare': 'mean'}).reset_index()
-
-
-
-
-           
-            metrics = {
-                "WSS": list(metric["whiteSpaceScore"].unique()),
-                "MS": list(metric["marketShare"]),
-            }
-
-            colorbar_titles = {
-            "WSS": "WSS",
-            "MS": "MS",
-            }
-            default_metric = "WSS"
+            # "Filter maps in the browser": the map filters a cube of the brand metrics
+            # itself and hands its filters back to the sidebar. The RTM overlay is not
+            # in the cube; it is always rendered by the server
+            map_filters = None
+            if client_maps and not show_volume and fits_client_cube(brand_rollup):
+                brand_cube = map_cube(
+                    f"{data.lower()}-brand-{level}", rollup_version(versions, PWANI_TABLES[data]), level,
+                    ("whiteSpaceScore", "marketShare"), brand_rollup, lambda units: registry.locations(geo_name, units),
+                )
+                units, locations = pd.Series(brand_cube["labels"]["unit"]), brand_cube["locations"]
+                layers = {}
+                map_filters = {
+                    "data": brand_cube,
+                    "filters": {"category": selected["category"], "brandName": selected_brand, "territory": selected["territory"]},
+                    "labels": {dim: all_label for dim, (_, all_label) in DETAIL_FILTERS.items()},
+                    "cascade": sidebar_cascade,
+                    "layers": {
+                        "WSS": {"label": "White Space Score", "metric": "whiteSpaceScore", "title": "WSS"},
+                        "MS": {"label": "Market Share", "metric": "marketShare", "title": "MS"},
+                    },
+                }
+            else:
+                metric = brand_rollup.slice(level, brandName=selected_brand, **selected)
+                units, locations = metric[level], registry.locations(geo_name, metric[level])
+
+                # z comes from the layer picked in the map menu
+                layers = {
+                    "WSS": {"label": "White Space Score", "trace": {"z": metric["whiteSpaceScore"], "colorbar.title.text": "WSS"}},
+                    "MS": {"label": "Market Share", "trace": {"z": metric["marketShare"], "colorbar.title.text": "MS"}},
+                }
+            if data == 'GT':
+                # RTM sells by sub-county; the crosswalk re-cuts it onto these territories
+                rtm_territories = rtm_by_territory(
+                    rollup_version(versions, "rtm_data_cleaned"), selected["category"], selected_brand, selected["territory"], rtm_rollup,
+                ).set_index("territory").reindex(to_keys(units))
+                layers["RTM"] = {"label": "RTM Volume", "trace": {"z": rtm_territories["qtyKgRtm"], "colorbar.title.text": "RTM Kg"}}
+                layers["AWS"] = {"label": "RTM AWS", "trace": {"z": rtm_territories["aws"], "colorbar.title.text": "AWS"}}
 
             fig_prov = go.Figure(go.Choroplethmapbox(
-                geojson=geo,
                 featureidkey=feautre_id,
-                locations=metric["market"],
-                z=metrics[default_metric],
+                locations=locations,
                 colorscale="Viridis",
                 marker_opacity=0.7,
                 marker_line_width=0.5,
-                text=metric["market"],  # hover name
+                text=units,  # hover name
                 hovertemplate="<b>%{text}</b><br>Score: %{z}<extra></extra>",
-                colorbar=dict(title=colorbar_titles[default_metric])
             ))
-            
+        
             if data=='GT' and show_volume:
+                layers = None
                 fig_prov = go.Figure(go.Choroplethmapbox(
-                    geojson=geo_rtm,
                     featureidkey=feautre_id_rtm,
-                    locations=metric_rtm["subcounty"],
+                    locations=registry.locations("subcounties", metric_rtm["subcounty"]),
                     z=metric_rtm["aws"],
                     colorscale="Reds",
                     marker_opacity=0.8,
@@ -1443,166 +923,69 @@ def main_app():
                 margin=dict(r=0, t=0, l=0, b=0)
             )
 
-            # Convert Plotly figure to JSON
-            fig_json = fig_prov.to_json()
-
-            # Prepare the metrics dictionary for JS
-
-            html = f"""
-            <style>
-            .wrap {{
-                position: relative;
-                height: 400px;
-                border-radius: 16px;
-                overflow: hidden;
-                background: #eef2f7;
-                border: 1px solid #e5e7eb;
-                box-shadow: 0 12px 28px rgba(0,0,0,.08);
-            }}
-            #plotA {{
-                position: absolute;
-                inset: 0;
-            }}
-            .fab {{
-                position: absolute;
-                top: 25px;
-                right: 12px;
-                z-index: 10;
-                width: 44px;
-                height: 44px;
-                border-radius: 50%;
-                border: none;
-                background: #fff;
-                box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                font: 700 18px/44px system-ui, sans-serif;
-                cursor: pointer;
-            }}
-            .menu {{
-                position: absolute;
-                top: 60px;
-                right: 12px;
-                z-index: 11;
-                width: 180px;
-                background: #fff;
-                border-radius: 12px;
-                box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                border: 1px solid #eef0f4;
-                display: none;
-            }}
-            .menu.open {{
-                display: block;
-            }}
-            .menu div {{
-                padding: 10px;
-                cursor: pointer;
-                border-bottom: 1px solid #e5e5e5;
-            }}
-            .menu div:last-child {{
-                border-bottom: none;
-            }}
-            .menu div:hover {{
-                background: #f3f6fb;
-            }}
-        .item{{ padding:10px 14px; cursor:pointer; font:500 14px/1.2 system-ui, sans-serif;}} .item:hover{{ background:#f3f6fb; }}
-
-            </style>
-
-            <div class="wrap">
-                <div id="plotA"></div>
-                <button id="fabA" class="fab">☰</button>
-                <div id="menuA" class="menu">
-                    <div class="item" data-metric="WSS">White Space Score</div>
-                    <div class="item" data-metric="MS">Market Share</div>
-                </div>
-            </div>
-
-            <script src="https://cdn.plot.ly/plotly-2.32.0.min.js"></script>
-            <script>
-                const fig = {fig_json};
-                const METRICS = {json.dumps(metrics)};
-                const COLORBARS = {json.dumps(colorbar_titles)};
-                const div = document.getElementById("plotA");
-                Plotly.newPlot(div, fig.data, fig.layout, {{responsive:true, displayModeBar:false}});
-
-                const fab = document.getElementById("fabA");
-                const menu = document.getElementById("menuA");
-
-                fab.addEventListener("click", () => {{
-                    menu.classList.toggle("open");
-                }});
-
-                document.querySelectorAll(".item").forEach(el => {{
-                    el.addEventListener("click", () => {{
-                        const metric = el.dataset.metric;
-                        Plotly.restyle(div, {{z: [METRICS[metric]]}}, [0]);
-                        Plotly.restyle(div, {{
-                                z: [METRICS[metric]],
-                'colorbar.title.text': COLORBARS[metric]
-                        }}, [0]);
-                        menu.classList.remove("open");
-                    }});
-                }});
-            </script>
-            """
-
-            st.components.v1.html(html, height=420, scrolling=False)
+            # One map for every view: toggling the RTM overlay or the browser filters
+            # updates it in place
+            choropleth_map(fig_prov, geo_rtm if data=='GT' and show_volume else geo,
+                           key="brand-map", layers=layers, layer="WSS", cube=map_filters,
+                           on_change=lambda: follow_map_filters("brand-map"))
             
 
             
         with right:
     # Choose geo path based on data type
             if data == 'MT':
-                geo_path = "storage/kenya.geojson"
+                geo_name, level = "counties", "county"
                 feature_id = "properties.COUNTY_NAM"
             elif data == 'GT':
-                geo_path = "storage/kenya_territories_lake.geojson"
+                geo_name, level = "territories", "territory"
                 feature_id = "properties.TERRITORY"
 
-            with open(geo_path) as f:
-                geo = json.load(f)
-
-            # Base dataset
-            df = COMP_DF.copy()
-            if category != "All Categories":
-                df = df[df["category"] == category]
-            if territory != "All Markets":
-                df = df[df["territory"] == territory]
-                
-                
-           
-            # Build data per brand
-            brands = (
-                df.groupby("brandName")["marketShare"]
-                .mean()
-                .sort_values(ascending=False)
-                .head(5)  # Take top 5
-                .reset_index()
-            )
-            top_brands = brands["brandName"].tolist()
-
-            METRICS = {}
+            geo = assets.topology(geo_name, zoom=MAP_ZOOM)
 
-            for brand_name in top_brands:
-                subset = df[df["brandName"] == brand_name]
-                brand_metric = subset.groupby("market", as_index=False)["marketShare"].mean()
-                METRICS[brand_name] = brand_metric["marketShare"].tolist()
+            # "Filter maps in the browser": the map ranks the competitors of a cube itself
+            map_filters = None
+            if client_maps and fits_client_cube(comp_rollup):
+                comp_cube = map_cube(
+                    f"{data.lower()}-competitor-{level}", rollup_version(versions, COMPETITOR_TABLES[data]), level,
+                    ("marketShare",), comp_rollup, lambda units: registry.locations(geo_name, units),
+                )
+                markets, locations = comp_cube["labels"]["unit"], comp_cube["locations"]
+                layers = {}
+                map_filters = {
+                    "data": comp_cube,
+                    "filters": selected,
+                    "labels": {dim: DETAIL_FILTERS[dim][1] for dim in selected},
+                    "cascade": sidebar_cascade,
+                    "rank": {"by": "brandName", "metric": "marketShare", "top": 5},
+                }
+            else:
+                # Top 5 competitor brands, then each one's share per market
+                brands = (
+                    comp_rollup.slice("national", by=("brandName",), **selected)
+                    .sort_values("marketShare", ascending=False)
+                    .head(5)  # Take top 5
+                )
+                top_brands = brands["brandName"].tolist()
 
+                shares = comp_rollup.slice(level, by=("brandName",), **selected)
+                shares = shares[shares["brandName"].isin(top_brands)].pivot(index=level, columns="brandName", values="marketShare")
+                markets, locations = shares.index, registry.locations(geo_name, shares.index)
 
-            default_brand = top_brands[0]
-          
+                # Markets where a brand has no rows stay blank on its map
+                layers = {
+                    brand_name: {"label": brand_name, "trace": {"z": shares[brand_name], "colorbar.title.text": brand_name}}
+                    for brand_name in top_brands
+                }
 
             # Build initial map
             fig = go.Figure(go.Choroplethmapbox(
-                geojson=geo,
                 featureidkey=feature_id,
-                locations=df["market"].unique(),
-                z=METRICS[default_brand],
+                locations=locations,
                 colorscale="Viridis",
                 marker_opacity=0.7,
                 marker_line_width=0.5,
-                text=df["market"].unique(),
+                text=markets,
                 hovertemplate="<b>%{text}</b><br>Market Share: %{z}<extra></extra>",
-                colorbar=dict(title=f"{default_brand}")
             ))
 
             fig.update_layout(
@@ -1613,198 +996,52 @@ def main_app():
                 margin=dict(r=0, t=0, l=0, b=0)
             )
 
-            fig_json = fig.to_json()
-
-            # --- HTML + CSS + JS using your bar chart hamburger styling ---
-            html = f"""
-            <style>
-                .wrap {{
-                    position: relative;
-                    height: 400px;
-                    border-radius: 16px;
-                    overflow: hidden;
-                    background: #eef2f7;
-                    border: 1px solid #e5e7eb;
-                    box-shadow: 0 12px 28px rgba(0,0,0,.08);
-                }}
-                #plotA {{
-                    position: absolute;
-                    inset: 0;
-                }}
-                .fab {{
-                    position: absolute;
-                    top: 25px;
-                    right: 12px;
-                    z-index: 10;
-                    width: 44px;
-                    height: 44px;
-                    border-radius: 50%;
-                    border: none;
-                    background: #fff;
-                    box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                    font: 700 18px/44px system-ui, sans-serif;
-                    cursor: pointer;
-                }}
-                .menu {{
-                    position: absolute;
-                    top: 90px;
-                    right: 12px;
-                    z-index: 11;
-                    width: 180px;
-                    background: #fff;
-                    border-radius: 12px;
-                    box-shadow: 0 8px 22px rgba(0,0,0,.12);
-                    border: 1px solid #eef0f4;
-                    display: none;
-                    overflow-y: auto;
-                    max-height: 150px;
-                }}
-                .menu.open {{
-                    display: block;
-                }}
-                .menu div {{
-                    padding: 10px;
-                    cursor: pointer;
-                    border-bottom: 1px solid #e5e5e5;
-                }}
-                .menu div:last-child {{
-                    border-bottom: none;
-                }}
-                .menu div:hover {{
-                    background: #f3f6fb;
-                }}
-                .item {{
-                    padding:10px 14px;
-                    cursor:pointer;
-                    font:500 14px/1.2 system-ui, sans-serif;
-                }}
-                .item:hover {{
-                    background:#f3f6fb;
-                }}
-            </style>
-
-            <div style="position:relative; height:400px; border-radius:16px; overflow:hidden; background:#fff; box-shadow:0 12px 28px rgba(0,0,0,0.12);">
-                <div id="plotA" style="position:absolute; inset:0;"></div>
-                <button id="fabA" class="fab">☰</button>
-                <div id="menuA" class="menu">
-                    {''.join([f'<div class="item" data-brand="{b}">{b}</div>' for b in top_brands])}
-                </div>
-            </div>
+            # The top brand is shown first; a brand picked in the menu stays while it ranks
+            choropleth_map(fig, geo, key="competitor-map", layers=layers, cube=map_filters,
+                           on_change=lambda: follow_map_filters("competitor-map"))
+            
 
-            <script src="https://cdn.plot.ly/plotly-2.32.0.min.js"></script>
-            <script>
-                const fig = {fig_json};
-                const METRICS = {json.dumps(METRICS)};
-                const div = document.getElementById("plotA");
-
-                Plotly.newPlot(div, fig.data, fig.layout, {{responsive:true, displayModeBar:false}});
-
-                const fab = document.getElementById("fabA");
-                const menu = document.getElementById("menuA");
-
-                fab.addEventListener("click", () => {{
-                    menu.style.display = menu.style.display === "block" ? "none" : "block";
-                }});
-
-                document.querySelectorAll(".item").forEach(el => {{
-                    el.addEventListener("click", () => {{
-                        const brand = el.dataset.brand;
-                        Plotly.restyle(div, {{
-                            z: [METRICS[brand]],
-                            'colorbar.title.text': brand
-                        }}, [0]);
-                        menu.style.display = "none";
-                    }});
-                }});
-            </script>
-            """
+        # Rows whose location names match no polygon never render; say which
+        map_sources = [
+            ("Brand map", PWANI_TABLES[data], brand_rollup, level, geo_name),
+            ("Competitor map", COMPETITOR_TABLES[data], comp_rollup, level, geo_name),
+        ]
+        if data == 'GT' and show_volume:
+            map_sources.append(("RTM overlay", "rtm_data_cleaned", rtm_rollup, "subcounty", "subcounties"))
+        unmatched = [
+            (name, report) for name, table, rollup, unit_level, boundaries in map_sources
+            if not (report := unmatched_locations(table, unit_level, boundaries, rollup_version(versions, table), rollup)).empty
+        ]
+        if unmatched:
+            with st.expander(f"⚠️ Locations not shown on the maps ({sum(len(r) for _, r in unmatched)})"):
+                for name, report in unmatched:
+                    st.markdown(f"**{name}**: rows whose location matches no boundary")
+                    st.dataframe(report.rename(columns={"value": "location", "key": "normalized"}), hide_index=True)
 
-            st.components.v1.html(html, height=480, scrolling=False)
-            
-            
         st.markdown("---")
     
         st.subheader("Detailed Brand Data")
     
      
-        filtered_rtm = rtm_data.copy()
-    
-        if category != "All Categories":
-            filtered_rtm = filtered_rtm[filtered_rtm['category'] == category]
-        
-        if brand != "All Brands":
-            filtered_rtm = filtered_rtm[filtered_rtm['brand'] == brand]
-        
-        if territory != "All Markets":
-            filtered_rtm = filtered_rtm[filtered_rtm['territory'] == territory]
-    
-        county_data = filtered_rtm.groupby('county').agg({
-            'qtyKgRtm': 'sum',
-            'aws': 'mean'
-        }).reset_index()
+        county_data = rtm_rollup.slice("county", brand=selected_brand, **selected)
       
     
         top_counties = county_data.sort_values('qtyKgRtm', ascending=False).head(5)
 
-       
-    
-        distributor_data = filtered_rtm.groupby(['distributorName','territory']).agg({
-            'valueSold': 'sum',
-            'customerName': 'nunique'
-        }).reset_index()
-    
-        top_distributors = distributor_data.dropna().nlargest(5, 'valueSold').sort_values('valueSold', ascending=False)
-    
-        if len(top_counties) > 0:
-            max_qty = top_counties['qtyKgRtm'].max()
-            top_counties['score_normalized'] = (top_counties['qtyKgRtm'] / max_qty * 100)
-           
-        if len(top_distributors) > 0:
-            max_sales = top_distributors['valueSold'].max()
-            top_distributors['sales_normalized'] = (top_distributors['valueSold'] / max_sales * 100)
+        # Cached per filter combination; the shared RTM frame is never copied
+        top_distributors = distributor_ranking(
+            rollup_version(versions, "rtm_data_cleaned"), selected["category"], selected_brand, selected["territory"], rtm_data,
+        )
     
         c1, c2, c3 = st.columns(3)
     
         with c1:
             st.markdown("**Top 5 Counties**")
-            for i, (idx, county) in enumerate(top_counties.iterrows()):
-                st.markdown(f"""
-                <div style="background: #eee; padding: 12px !important; margin: 8px 0; border-radius: 8px;
-                            border-left: 4px solid #3B82F6; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <span style="background: linear-gradient(to right, #3B82F6, #06B6D4); color: white;
-                                    padding: 4px 8px; border-radius: 4px; font-weight: bold; font-size: 12px;">{i+1}</span>
-                        <div style="flex-grow: 1; margin-left: 12px;">
-                            <strong>{county['county']}</strong><br>
-                            <small>Volume: {county['qtyKgRtm']:.2f} Kg • AWS: {county['aws']:.1f}%</small>
-                            <div style="background: #E5E7EB; height: 4px; border-radius: 2px; margin-top: 4px;">
-                                <div style="background: linear-gradient(to right, #3B82F6, #06B6D4); height: 4px; width: {county['score_normalized']:.1f}%; border-radius: 2px;"></div>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            st.markdown(card_list("counties", top_counties), unsafe_allow_html=True)
     
         with c2:
             st.markdown("**Top Distributor Performance**")
-            for idx, d in top_distributors.iterrows():
-                st.markdown(f"""
-                            <style>
-                            .distributor-card {{
-                            padding:10px !important  
-                            }}
-                            </style>
-                <div class="distributor-card">
-                    <strong>{d['distributorName']}</strong> <small>({d['territory']})</small><br>
-                    <div style="display: flex; justify-content: space-between; margin: 4px 0;">
-                        <span>Sales: <strong style="color: #059669;">KES {d['valueSold']:,.0f}</strong></span>
-                        <span>Coverage: <strong style="color: #3B82F6;">{d['customerName']} customers</strong></span>
-                    </div>
-                    <div style="background: #E5E7EB; height: 4px; border-radius: 2px; margin-top: 4px;">
-                        <div style="background: linear-gradient(to right, #10B981, #059669); height: 4px; width: {d['sales_normalized']:.1f}%; border-radius: 2px;"></div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            st.markdown(card_list("distributors", top_distributors), unsafe_allow_html=True)
             
      
         with c3:
@@ -1890,10 +1127,13 @@ def main_app():
         # Load data only when on content generation page
     # --- Safe GT Content Generation Filters ---
 
-        gt_data = load_gt_data()
+        gt_data = loaded["gt"]
+
+        # Brand -> category / territory options shared by GT and RTM, built once per data version
+        options = content_generation_index(filter_index_version(versions, "GT"), gt_data, rtm_data)
 
         # 1. Build brand list safely
-        gt_brands = sorted(set(gt_data['brandName'].unique()).intersection(rtm_data['brand'].unique()))
+        gt_brands = options["categories"][()]
         if not gt_brands:
             st.warning("⚠️ No GT brands available for content generation.")
             st.stop()
@@ -1901,27 +1141,17 @@ def main_app():
         brand = st.sidebar.selectbox("Select Brand", gt_brands, key="content_gen_brand")
 
         # 2. Build category list safely
-        category_gt = gt_data.loc[gt_data["brandName"] == brand, 'category'].unique()
-        category_rtm = rtm_data.loc[rtm_data['brand'] == brand, 'category'].unique()
-        category_S = sorted(set(category_rtm).intersection(category_gt))
+        category_S = options["categories"].get((brand,), [])
 
         if not category_S:
             st.warning(f"⚠️ No categories found for brand '{brand}'.")
             st.write("Brands:", gt_brands)
-            st.write("Categories (GT):", category_gt)
-            st.write("Categories (RTM):", category_rtm)
-            st.write("Intersection:", category_S)
-            st.write("Territories (GT):", gt_territory)
-            st.write("Territories (RTM):", rtm_territories)
-            st.write("Intersection:", territories)
             st.stop()
 
         category = st.sidebar.selectbox("Select Category", category_S, key="content_gen_category")
 
         # 3. Build territory list safely
-        gt_territory = gt_data.loc[gt_data['brandName'] == brand, 'market'].unique()
-        rtm_territories = rtm_data.loc[rtm_data['brand'] == brand, 'territory'].unique()
-        territories = sorted(set(gt_territory).intersection(rtm_territories))
+        territories = options["territories"].get((brand,), [])
 
         if not territories:
             st.warning(f"⚠️ No territories found for brand '{brand}' and category '{category}'.")
@@ -2006,6 +1236,9 @@ if __name__ == "__main__":
     if 'username' not in st.session_state:
         st.session_state.username = ''
     
+    # Start the process-wide cache warm-up (no-op after the first run)
+    get_cache_warmer()
+
     # Route based on login status
     if st.session_state.logged_in:
         main_app()
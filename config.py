@@ -1,7 +1,11 @@
 from sqlmodel import create_engine
+from sqlalchemy import event
 
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
+import threading
+import time
 
 load_dotenv(dotenv_path='.env')  # Load .env file into environment variables
 
@@ -27,8 +31,169 @@ def load_engine():
         f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
         pool_pre_ping=True,          # ✅ Checks if connection is alive before use
         pool_recycle=1800,           # ✅ Prevents MySQL timeout issues
-        pool_size=10,                # ✅ Safe pool size
-        max_overflow=5,              # ✅ Allow some burst connections
+        pool_size=int(os.getenv('DB_POOL_SIZE', 10)),       # ✅ Safe pool size
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 5)),  # ✅ Allow some burst connections
+        pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', 30)),
     )
     return engine
 
+
+class EngineStats:
+    """Thread-safe counters for pool checkouts, waits, overflow and query timing."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_opened = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.overflow_checkouts = 0
+            self.peak_checked_out = 0
+            self.waits = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.queries = 0
+            self.query_seconds = 0.0
+            self.slowest_query_seconds = 0.0
+            self.slowest_query = ""
+
+    def record_connect(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def record_checkout(self, pool):
+        with self._lock:
+            self.checkouts += 1
+            if pool.checkedout() > pool.size():
+                self.overflow_checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_query(self, statement, seconds):
+        with self._lock:
+            self.queries += 1
+            self.query_seconds += seconds
+            if seconds > self.slowest_query_seconds:
+                self.slowest_query_seconds = seconds
+                self.slowest_query = " ".join(statement.split())[:200]
+
+    def as_dict(self, pool=None):
+        with self._lock:
+            stats = {
+                "connections_opened": self.connections_opened,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_checked_out": self.peak_checked_out,
+                "avg_wait_ms": round(1000 * self.wait_seconds / self.waits, 1) if self.waits else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait_seconds, 1),
+                "queries": self.queries,
+                "avg_query_ms": round(1000 * self.query_seconds / self.queries, 1) if self.queries else 0.0,
+                "slowest_query_ms": round(1000 * self.slowest_query_seconds, 1),
+                "slowest_query": self.slowest_query,
+            }
+        if pool is not None:
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+ENGINE_STATS = EngineStats()
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _instrument(engine):
+    @event.listens_for(engine.pool, "connect")
+    def _on_connect(dbapi_conn, record):
+        ENGINE_STATS.record_connect()
+
+    @event.listens_for(engine.pool, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        ENGINE_STATS.record_checkout(engine.pool)
+
+    @event.listens_for(engine.pool, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        ENGINE_STATS.record_checkin()
+
+    # The start time lives on the statement's execution context, so a statement
+    # that fails leaves nothing behind on the pooled connection.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        ENGINE_STATS.record_query(statement, time.perf_counter() - context._query_start)
+
+
+def get_engine():
+    """The process-wide engine shared by every reader, created on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = load_engine()
+                _instrument(engine)
+                _engine = engine
+    return _engine
+
+
+@contextmanager
+def connect():
+    """Check a connection out of the shared pool, recording how long the checkout waited."""
+    engine = get_engine()
+    started = time.perf_counter()
+    conn = engine.connect()
+    ENGINE_STATS.record_wait(time.perf_counter() - started)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def engine_stats():
+    """Pool and query telemetry for the shared engine."""
+    return ENGINE_STATS.as_dict(_engine.pool if _engine is not None else None)
+
+
+def load_snapshot_dir():
+    """Directory holding the local Parquet snapshots, or None when snapshots are disabled."""
+
+    if os.getenv("USE_SNAPSHOTS", "1").lower() in ("0", "false", "no"):
+        return None
+    return os.getenv("SNAPSHOT_DIR", os.path.join("storage", "snapshots"))
+
+
+def load_warmup_workers():
+    """Threads used to warm the data caches at startup; 0 disables the warm-up."""
+
+    return int(os.getenv("CACHE_WARMUP_WORKERS", 4))
+
+
+def load_freshness_interval():
+    """Seconds between freshness probes of the source tables; 0 disables the schedule."""
+
+    return int(os.getenv("FRESHNESS_PROBE_SECONDS", 300))
+
+
+def load_client_cube_rows():
+    """Largest map cube (rows at its finest grain) shipped for in-browser filtering."""
+
+    return int(os.getenv("CLIENT_CUBE_MAX_ROWS", 200_000))
@@ -1,4 +1,7 @@
 from .mt_data import DataReaderMt
 from .gt_data import DataReaderGT
-from .geojson_fetcher import load_county_geojson,load_province_geojson,aggregate_brand_data_by_geography
-from .target_audience_data import read_target_audience
\ No newline at end of file
+from .aggregates import AggregateReader
+from .geojson_fetcher import load_county_geojson,load_province_geojson,load_subcounty_geojson,get_geo_registry
+from .target_audience_data import read_target_audience
+from .demographics import load_demographic_index
+from .geo_crosswalk import load_crosswalk,crosswalk_weights,remap
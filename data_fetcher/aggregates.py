@@ -0,0 +1,139 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import kpi
+from utils.kpi import CONCENTRATION_VOLUME, REPEATED_VOLUME_KEYS, SHARE_VOLUME
+from .query_builder import SCHEMA, DateWindow, read_query, resolve_latest_periods
+
+
+class AggregateReader:
+    """KPI rollups for the summary dashboard, computed with GROUP BY in MySQL.
+
+    Only the aggregated rows cross the wire; DataReaderMt / DataReaderGT stay
+    the source for drill-downs that need the raw rows.
+    """
+
+    # data -> (pwani table, competitor table); volume columns follow utils.kpi
+    TABLES = {
+        "MT": ("mt_pwani_data_cleaned", "mt_competitor_data_cleaned"),
+        "GT": ("gt_data_pwani", "gt_competitor_data"),
+    }
+
+    def __init__(self, data, window=None):
+        if data not in self.TABLES:
+            raise ValueError("Invalid data type. Expected 'MT' or 'GT'.")
+        self.data = data
+        self.window = window
+        self.pwani_table, self.comp_table = self.TABLES[data]
+        self.volume_col, self.comp_volume_col = SHARE_VOLUME[data]
+        self.concentration_col = CONCENTRATION_VOLUME[data]
+        self._windows = None
+
+    def windows(self):
+        """Row window per table, resolved once: the caller's window, else the
+        current year for MT and the latest date of each table for GT."""
+        if self._windows is None:
+            tables = (self.pwani_table, self.comp_table)
+            if self.window is not None:
+                self._windows = dict.fromkeys(tables, self.window)
+            elif self.data == "MT":
+                self._windows = dict.fromkeys(tables, DateWindow.year())
+            else:
+                latest = resolve_latest_periods(tables)
+                missing = [t for t in tables if latest[t] is None]
+                if missing:
+                    raise ValueError(f"No dated rows in {', '.join(missing)}")
+                self._windows = {t: DateWindow.day(latest[t]) for t in tables}
+        return self._windows
+
+    def _where(self, table, name=""):
+        window = self.windows()[table]
+        return window.sql(name=name), window.params(name=name)
+
+    def _volumes(self, table, column, name=""):
+        """Rows (brandName, volume) of `table` in its window, as a derived table.
+        Repeated volumes (see utils.kpi.REPEATED_VOLUME_KEYS) appear once."""
+        where, params = self._where(table, name=name)
+        keys = REPEATED_VOLUME_KEYS.get(self.data)
+        if keys:
+            select = f"SELECT DISTINCT {', '.join(keys)}, {column} AS volume"
+        else:
+            select = f"SELECT brandName, {column} AS volume"
+        return f"({select} FROM {SCHEMA}.{table} WHERE {where})", params
+
+    def last_update(self):
+        where, params = self._where(self.pwani_table)
+        query = f"""
+            SELECT MAX(date) AS date
+            FROM {SCHEMA}.{self.pwani_table}
+            WHERE {where}
+        """
+        return pd.to_datetime(read_query(query, params)["date"].iloc[0])
+
+    def brand_rollup(self):
+        """One row per brand/category/market with mean white space and summed share/strength."""
+        where, params = self._where(self.pwani_table)
+        query = f"""
+            SELECT brandName, category, market,
+                   AVG(whiteSpaceScore) AS whiteSpaceScore,
+                   SUM(marketShare) AS marketShare,
+                   SUM(competitorStrength) AS competitorStrength
+            FROM {SCHEMA}.{self.pwani_table}
+            WHERE {where}
+              AND brandName IS NOT NULL AND category IS NOT NULL AND market IS NOT NULL
+            GROUP BY brandName, category, market
+        """
+        return read_query(query, params)
+
+    def market_metrics(self):
+        """Mean white space score and market share per market, for the choropleth."""
+        where, params = self._where(self.pwani_table)
+        query = f"""
+            SELECT market,
+                   AVG(whiteSpaceScore) AS whiteSpaceScore,
+                   AVG(marketShare) AS marketShare
+            FROM {SCHEMA}.{self.pwani_table}
+            WHERE {where} AND market IS NOT NULL
+            GROUP BY market
+            ORDER BY market
+        """
+        return read_query(query, params)
+
+    def competitor_volume(self):
+        """Total competitor volume per brand, the input of the concentration index."""
+        volumes, params = self._volumes(self.comp_table, self.concentration_col)
+        query = f"""
+            SELECT brandName, SUM(volume) AS volume
+            FROM {volumes} AS v
+            WHERE brandName IS NOT NULL
+            GROUP BY brandName
+        """
+        return read_query(query, params)
+
+    def market_share(self):
+        """Pwani and competitor volume behind the market share."""
+        pwani, pwani_params = self._volumes(self.pwani_table, self.volume_col, name="p_")
+        competitor, comp_params = self._volumes(self.comp_table, self.comp_volume_col, name="c_")
+        query = f"""
+            SELECT
+                (SELECT SUM(volume) FROM {pwani} AS p) AS pwani,
+                (SELECT SUM(volume) FROM {competitor} AS c) AS competitor
+        """
+        row = read_query(query, {**pwani_params, **comp_params}).iloc[0]
+        pwani = 0.0 if pd.isna(row["pwani"]) else float(row["pwani"])
+        competitor = 0.0 if pd.isna(row["competitor"]) else float(row["competitor"])
+        return float(kpi.market_share(pwani, competitor))
+
+    def summary(self):
+        """Everything the summary page needs; the rollups run concurrently on the shared pool."""
+        self.windows()
+        parts = {
+            "last_update": self.last_update,
+            "brand_rollup": self.brand_rollup,
+            "market_metrics": self.market_metrics,
+            "competitor_volume": self.competitor_volume,
+            "market_share": self.market_share,
+        }
+        with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+            futures = {name: pool.submit(fn) for name, fn in parts.items()}
+            return {name: future.result() for name, future in futures.items()}
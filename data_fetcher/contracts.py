@@ -0,0 +1,151 @@
+"""Per-page column contracts for the data readers.
+
+Each page of `main_app` declares the columns it reads from every table, so the
+readers only fetch and materialize those instead of `SELECT *`. Numeric and
+date columns carry a declared dtype; text columns keep pandas' default unless
+declared CATEGORY, and COMPACT numerics are narrowed to the smallest lossless
+dtype.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype
+
+TEXT = None
+CATEGORY = "category"
+COMPACT = "compact"
+
+TABLE_DTYPES = {
+    "mt_pwani_data_cleaned": {
+        "date": "datetime64[ns]",
+        "brandName": TEXT,
+        "category": TEXT,
+        "market": TEXT,
+        "territory": TEXT,
+        "cluster": TEXT,
+        "whiteSpaceScore": "float64",
+        "marketShare": "float64",
+        "competitorStrength": "float64",
+        "quantity": "float64",
+        "ped": "float64",
+        "brandZVol": "float64",
+    },
+    "mt_competitor_data_cleaned": {
+        "date": "datetime64[ns]",
+        "brandName": TEXT,
+        "category": TEXT,
+        "market": TEXT,
+        "territory": TEXT,
+        "marketShare": "float64",
+        "quantity": "float64",
+        "totalQuantity": "float64",
+    },
+    "gt_data_pwani": {
+        "date": "datetime64[ns]",
+        "brandName": TEXT,
+        "category": TEXT,
+        "market": TEXT,
+        "territory": TEXT,
+        "cluster": TEXT,
+        "whiteSpaceScore": "float64",
+        "marketShare": "float64",
+        "competitorStrength": "float64",
+        "brandTotalVolume": "float64",
+        "ped": "float64",
+        "brandZVol": "float64",
+    },
+    "gt_competitor_data": {
+        "date": "datetime64[ns]",
+        "brandName": TEXT,
+        "category": TEXT,
+        "market": TEXT,
+        "territory": TEXT,
+        "marketShare": "float64",
+        "brandTotalVolume": "float64",
+    },
+    "rtm_data_cleaned": {
+        "date": "datetime64[ns]",
+        "brand": CATEGORY,
+        "category": CATEGORY,
+        "territory": CATEGORY,
+        "county": CATEGORY,
+        "subcounty": CATEGORY,
+        "distributorName": CATEGORY,
+        "customerName": CATEGORY,
+        "aws": COMPACT,
+        "qtyKgRtm": COMPACT,
+        "valueSold": COMPACT,
+    },
+    "target_audience_territory": {
+        "brandName": TEXT,
+        "category": TEXT,
+        "market": TEXT,
+        "provincePopulation": "float64",
+        "percentOfProvince": "float64",
+    },
+}
+
+_DETAIL_PWANI = ["brandName", "category", "market", "territory", "cluster",
+                 "whiteSpaceScore", "marketShare", "ped", "brandZVol"]
+
+VIEW_COLUMNS = {
+    "detail": {
+        "mt_pwani_data_cleaned": _DETAIL_PWANI + ["quantity"],
+        "mt_competitor_data_cleaned": ["brandName", "category", "market", "territory",
+                                       "marketShare", "quantity", "totalQuantity"],
+        "gt_data_pwani": _DETAIL_PWANI + ["brandTotalVolume"],
+        "gt_competitor_data": ["brandName", "category", "market", "territory",
+                               "marketShare", "brandTotalVolume"],
+        "rtm_data_cleaned": ["brand", "category", "territory", "county", "subcounty",
+                             "distributorName", "customerName", "aws", "qtyKgRtm", "valueSold"],
+        "target_audience_territory": ["brandName", "category", "market",
+                                      "provincePopulation", "percentOfProvince"],
+    },
+    "content_generation": {
+        "gt_data_pwani": ["brandName", "category", "market"],
+        "rtm_data_cleaned": ["brand", "category", "territory"],
+    },
+}
+
+
+def columns_for(table, view=None):
+    """Columns `view` needs from `table`; None means every column (SELECT *)."""
+    if view is None:
+        return None
+    if view not in VIEW_COLUMNS:
+        raise ValueError(f"Unknown view: {view}")
+    if table not in VIEW_COLUMNS[view]:
+        raise ValueError(f"View '{view}' does not read {table}")
+    return VIEW_COLUMNS[view][table]
+
+
+def select_list(columns):
+    """SQL select list for a projection."""
+    if columns is None:
+        return "*"
+    return ", ".join(f"`{c}`" for c in columns)
+
+
+def apply_dtypes(df, table):
+    """Cast a frame to the declared dtypes of `table`."""
+    declared = TABLE_DTYPES.get(table, {})
+    for col in df.columns:
+        dtype = declared.get(col)
+        if dtype == "datetime64[ns]":
+            df[col] = pd.to_datetime(df[col])
+        elif dtype == COMPACT:
+            df[col] = narrowest_numeric(df[col])
+        elif dtype is not None and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def narrowest_numeric(s):
+    """Downcast a numeric column to the smallest dtype that holds it without loss."""
+    if is_integer_dtype(s.dtype):
+        return pd.to_numeric(s, downcast="integer")
+    if is_float_dtype(s.dtype) and s.dtype != np.float32:
+        narrow = s.astype(np.float32)
+        if np.array_equal(narrow.to_numpy(dtype=np.float64), s.to_numpy(dtype=np.float64), equal_nan=True):
+            return narrow
+    return s
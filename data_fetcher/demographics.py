@@ -0,0 +1,112 @@
+import base64
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+DEMOGRAPHIC_PATH = os.path.join("storage", "demographic_data.csv")
+LOCATION_COLUMN = "Location"
+
+_GCP = ("KES m", "Viridis", ",.0f")  # gross county product by sector
+_PEOPLE = ("people", "Viridis", ",.0f")
+_PERCENT = ("%", "Viridis", ".1f")
+
+# CSV column -> (menu label, unit, colour scale, d3 hover format), in menu order
+DEMOGRAPHIC_METRICS = {
+    "GDP 2022": ("GDP 2022", *_GCP),
+    "Total Population": ("Total Population", *_PEOPLE),
+    "Male Population": ("Male Population", *_PEOPLE),
+    "Female population": ("Female Population", *_PEOPLE),
+    "Households-Total": ("Households", "households", "Viridis", ",.0f"),
+    "Sq Km": ("Area", "km²", "Viridis", ",.0f"),
+    "Persons per Sq. Km": ("Population Density", "people/km²", "Viridis", ",.1f"),
+    "PCI 2022": ("Per Capita Income 2022", "KES", "Viridis", ",.0f"),
+    "number of students enrolled in secondary schools": ("Secondary School Enrolment", "students", "Viridis", ",.0f"),
+    "HDI": ("Human Development Index", "", "Viridis", ".3f"),
+    "Agriculture, Forestry & Fishing": ("Agriculture, Forestry & Fishing", *_GCP),
+    "Mining & Quarrying": ("Mining & Quarrying", *_GCP),
+    "Manufacturing": ("Manufacturing", *_GCP),
+    "Electricity Supply": ("Electricity Supply", *_GCP),
+    "Water Supply; Waste Collection": ("Water Supply; Waste Collection", *_GCP),
+    "Construction": ("Construction", *_GCP),
+    "Wholesale & Retail (Motor Repair)": ("Wholesale & Retail (Motor Repair)", *_GCP),
+    "Transport & Storage": ("Transport & Storage", *_GCP),
+    "Accommodation & Food Service": ("Accommodation & Food Service", *_GCP),
+    "Information & Communication": ("Information & Communication", *_GCP),
+    "Financial & Insurance Activities": ("Financial & Insurance Activities", *_GCP),
+    "Real Estate Activities": ("Real Estate Activities", *_GCP),
+    "Professional & Technical Services": ("Professional & Technical Services", *_GCP),
+    "Administrative Support Services": ("Administrative Support Services", *_GCP),
+    "Public Administration & Defense": ("Public Administration & Defense", *_GCP),
+    "Education": ("Education", *_GCP),
+    "Human Health & Social Work": ("Human Health & Social Work", *_GCP),
+    "Other Service Activities": ("Other Service Activities", *_GCP),
+    "Financial Services Indirectly Measured": ("Financial Services Indirectly Measured", *_GCP),
+    "GCP": ("Gross County Product", *_GCP),
+    "Internet Penetration": ("Internet Penetration", *_PERCENT),
+    "Catholic": ("Catholic", *_PEOPLE),
+    "Protestant": ("Protestant", *_PEOPLE),
+    "Evangelicals": ("Evangelicals", *_PEOPLE),
+    "AIC": ("AIC", *_PEOPLE),
+    "Orthodox": ("Orthodox", *_PEOPLE),
+    "Others": ("Other Religions", *_PEOPLE),
+    "Muslims": ("Muslims", *_PEOPLE),
+    "Poverty": ("Poverty Rate", "%", "Reds", ".1f"),
+    "Purchase Stock (%)": ("Food from Purchases", *_PERCENT),
+    "Own Production (%)": ("Food from Own Production", *_PERCENT),
+    "Gifts (%)": ("Food from Gifts", *_PERCENT),
+    # Stored as a fraction; the hover format scales it to a percentage
+    "electricity access Percentage": ("Electricity Access", "", "Blues", ".1%"),
+    "access to sanitation": ("Access to Sanitation", "%", "Blues", ".1f"),
+}
+
+
+class DemographicIndex:
+    """The county demographic table as one read-only float32 array per metric.
+
+    Metrics are listed in `DEMOGRAPHIC_METRICS` order with their display
+    metadata; columns the CSV lacks are skipped and unknown columns are
+    ignored.
+    """
+
+    def __init__(self, frame, metrics=DEMOGRAPHIC_METRICS):
+        self.locations = tuple(frame[LOCATION_COLUMN].astype(str))
+        self.metrics = {column: meta for column, meta in metrics.items() if column in frame.columns}
+        self.values = {}
+        for column in self.metrics:
+            values = pd.to_numeric(frame[column], errors="coerce").to_numpy(np.float32)
+            values.flags.writeable = False
+            self.values[column] = values
+
+    def label(self, column):
+        label, unit, _, _ = self.metrics[column]
+        return f"{label} ({unit})" if unit else label
+
+    def layers(self):
+        """Every metric as a map layer for services.choropleth: its menu label and
+        trace settings, with z as base64 little-endian float32 (NaN where a
+        county has no value), in `locations` order."""
+        return {
+            column: {
+                "label": label,
+                "trace": {
+                    "z": base64.b64encode(self.values[column].astype("<f4").tobytes()).decode("ascii"),
+                    "colorscale": colorscale,
+                    "hovertemplate": "<b>%{text}</b><br>%{z:" + hoverformat + "}<extra></extra>",
+                    "colorbar.title.text": self.label(column),
+                },
+            }
+            for column, (label, _, colorscale, hoverformat) in self.metrics.items()
+        }
+
+
+def read_demographics(path=DEMOGRAPHIC_PATH):
+    return DemographicIndex(pd.read_csv(path))
+
+
+@st.cache_resource(show_spinner=False)
+def load_demographic_index(path=DEMOGRAPHIC_PATH):
+    """The demographic table, parsed once per process and shared by every session."""
+    return read_demographics(path)
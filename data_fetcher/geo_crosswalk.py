@@ -0,0 +1,144 @@
+"""Sub-county / county / territory crosswalk, computed once from the boundary files.
+
+    python -m data_fetcher.geo_crosswalk
+
+Every sub-county is sampled on a regular grid and each sample is located in
+the county and territory layers, so the table records which share of each
+sub-county's area falls in which county and territory. Re-run whenever a
+boundary file in storage/ changes.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import to_keys
+from utils.geometry import bounds, locate
+from .geojson_fetcher import GeoRegistry
+
+
+CROSSWALK_PATH = os.path.join("storage", "geo_crosswalk.csv")
+GRID_DEGREES = 0.01  # ~1.1 km
+MIN_SAMPLES = 200  # below this a sub-county gets a finer grid of its own
+LEVELS = ("subcounty", "county", "territory")
+# level -> (boundary set, normalized key property, display name property)
+LEVEL_SOURCES = {
+    "subcounty": ("subcounties", "SUBCOUNTY_KEY", "shapeName"),
+    "county": ("counties", "COUNTY_KEY", "COUNTY_NAM"),
+    "territory": ("territories", "PROV_KEY", "TERRITORY"),
+}
+KM_PER_DEGREE = 111.32
+
+
+def _grid(x0, y0, x1, y1, step):
+    xs, ys = np.meshgrid(np.arange(x0 + step / 2, x1, step), np.arange(y0 + step / 2, y1, step))
+    return xs.ravel(), ys.ravel()
+
+
+def build(step=GRID_DEGREES, level=None, registry=None):
+    """Crosswalk rows (subcounty, county, territory, area_km2, share) plus display names.
+
+    `level` picks a simplified boundary variant; full detail by default, since
+    urban sub-counties are only a few kilometres across.
+    """
+    registry = registry or GeoRegistry()
+    layers = {lvl: registry.get(name, level)["features"] for lvl, (name, _, _) in LEVEL_SOURCES.items()}
+    sub_key = LEVEL_SOURCES["subcounty"][1]
+
+    extent = np.array([bounds(f["geometry"]) for f in layers["subcounty"]])
+    xs, ys = _grid(*extent[:, :2].min(axis=0), *extent[:, 2:].max(axis=0), step)
+    subs = locate(layers["subcounty"], sub_key, xs, ys)
+    cell = np.full(len(xs), step * step)
+
+    # Sub-counties that caught too few samples are resampled on a finer grid of their own
+    counts = pd.Series(subs).value_counts()
+    for feat in layers["subcounty"]:
+        key = feat["properties"][sub_key]
+        if counts.get(key, 0) < MIN_SAMPLES:
+            x0, y0, x1, y1 = bounds(feat["geometry"])
+            fine = max(x1 - x0, y1 - y0) / 40
+            fx, fy = _grid(x0, y0, x1, y1, fine)
+            labels = locate([feat], sub_key, fx, fy)
+            subs[subs == key] = ""
+            xs, ys = np.concatenate([xs, fx]), np.concatenate([ys, fy])
+            subs = np.concatenate([subs, labels])
+            cell = np.concatenate([cell, np.full(len(fx), fine * fine)])
+
+    inside = subs != ""
+    xs, ys, subs, cell = xs[inside], ys[inside], subs[inside], cell[inside]
+    area = cell * KM_PER_DEGREE ** 2 * np.cos(np.radians(ys))
+
+    samples = pd.DataFrame({
+        "subcounty": subs,
+        "county": locate(layers["county"], LEVEL_SOURCES["county"][1], xs, ys),
+        "territory": locate(layers["territory"], LEVEL_SOURCES["territory"][1], xs, ys),
+        "area_km2": area,
+    })
+    unmatched = samples[(samples["county"] == "") | (samples["territory"] == "")]["area_km2"].sum()
+    # Border slivers where the layers disagree are dropped; shares are over matched area
+    samples = samples[(samples["county"] != "") & (samples["territory"] != "")]
+
+    crosswalk = samples.groupby(list(LEVELS), as_index=False)["area_km2"].sum()
+    crosswalk["share"] = crosswalk["area_km2"] / crosswalk.groupby("subcounty")["area_km2"].transform("sum")
+    for lvl, (_, key, name) in LEVEL_SOURCES.items():
+        names = {f["properties"][key]: f["properties"].get(name) for f in layers[lvl]}
+        crosswalk[f"{lvl}_name"] = crosswalk[lvl].map(names)
+    crosswalk["area_km2"] = crosswalk["area_km2"].round(3)
+    crosswalk["share"] = crosswalk["share"].round(5)
+    return crosswalk, unmatched / (unmatched + samples["area_km2"].sum())
+
+
+@st.cache_resource(show_spinner=False)
+def load_crosswalk(path=CROSSWALK_PATH):
+    """The stored crosswalk, shared by every session; treat it as read-only."""
+    return pd.read_csv(path, keep_default_na=False)
+
+
+def crosswalk_weights(from_level, to_level):
+    """Share of each `from_level` unit's area that lies in each `to_level` unit.
+
+    Columns `[from_level, to_level, weight]`; weights of one `from_level`
+    unit sum to 1, so an additive metric is re-cut by multiplying by
+    `weight` and summing per `to_level` unit, in either direction.
+    """
+    if from_level not in LEVELS or to_level not in LEVELS:
+        raise ValueError(f"Levels must be among {LEVELS}")
+    crosswalk = load_crosswalk()
+    pieces = crosswalk.groupby([from_level, to_level], as_index=False)["area_km2"].sum()
+    pieces["weight"] = pieces["area_km2"] / pieces.groupby(from_level)["area_km2"].transform("sum")
+    return pieces[[from_level, to_level, "weight", "area_km2"]]
+
+
+def remap(df, column, from_level, to_level, sums=(), means=()):
+    """Re-express metrics keyed by `column` (names at `from_level`) at `to_level`.
+
+    `sums` are split by area share (additive metrics such as volume); `means`
+    are area-weighted averages (rates, scores) over the pieces that have a
+    value. Keys are matched after `to_keys` normalization; rows that match
+    nothing are dropped.
+    """
+    weights = crosswalk_weights(from_level, to_level)
+    keyed = df.assign(**{from_level: to_keys(df[column])})
+    if from_level != column:
+        keyed = keyed.drop(columns=[column])
+    joined = keyed.merge(weights, on=from_level, how="inner")
+    out = joined[[to_level]].copy()
+    for col in sums:
+        out[col] = joined[col] * joined["weight"]
+    for col in means:
+        known = joined[col].notna()
+        out[col] = (joined[col] * joined["area_km2"]).where(known, 0)
+        out[f"{col}.area"] = joined["area_km2"].where(known, 0)
+    grouped = out.groupby(to_level, as_index=False).sum(min_count=1)
+    for col in means:
+        grouped[col] = grouped[col] / grouped.pop(f"{col}.area").where(lambda a: a > 0)
+    return grouped
+
+
+if __name__ == "__main__":
+    table, unmatched = build()
+    table.to_csv(CROSSWALK_PATH, index=False)
+    print(f"{len(table)} rows, {table['subcounty'].nunique()} sub-counties, "
+          f"{table['county'].nunique()} counties, {table['territory'].nunique()} territories; "
+          f"{unmatched:.2%} of sampled area fell outside a county or territory -> {CROSSWALK_PATH}")
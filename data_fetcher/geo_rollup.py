@@ -0,0 +1,152 @@
+import itertools
+
+import pandas as pd
+
+
+ALL = "*"  # dimension value of rows rolled up over every value of that dimension
+NATIONAL = "national"
+
+# Source table -> how its rows roll up:
+#   levels:  level -> column naming the unit at that level (None for the national total)
+#   dims:    filter dimensions; every combination of values and ALL is precomputed
+#   metrics: name -> (column, "mean" | "sum" | "count"); count ignores the column
+ROLLUP_SPECS = {
+    "mt_pwani_data_cleaned": {
+        "levels": {"county": "market", "territory": "territory", NATIONAL: None},
+        "dims": ("category", "brandName", "territory"),
+        "metrics": {
+            "whiteSpaceScore": ("whiteSpaceScore", "mean"),
+            "marketShare": ("marketShare", "mean"),
+            "competitorStrength": ("competitorStrength", "mean"),
+            "quantity": ("quantity", "sum"),
+        },
+    },
+    "gt_data_pwani": {
+        "levels": {"territory": "market", NATIONAL: None},
+        "dims": ("category", "brandName", "territory"),
+        "metrics": {
+            "whiteSpaceScore": ("whiteSpaceScore", "mean"),
+            "marketShare": ("marketShare", "mean"),
+            "competitorStrength": ("competitorStrength", "mean"),
+            "brandTotalVolume": ("brandTotalVolume", "sum"),
+        },
+    },
+    "mt_competitor_data_cleaned": {
+        "levels": {"county": "market", NATIONAL: None},
+        "dims": ("category", "brandName", "territory"),
+        "metrics": {"marketShare": ("marketShare", "mean"), "quantity": ("quantity", "sum")},
+    },
+    "gt_competitor_data": {
+        "levels": {"territory": "market", NATIONAL: None},
+        "dims": ("category", "brandName", "territory"),
+        "metrics": {"marketShare": ("marketShare", "mean"), "brandTotalVolume": ("brandTotalVolume", "sum")},
+    },
+    "rtm_data_cleaned": {
+        "levels": {"subcounty": "subcounty", "county": "county", "territory": "territory", NATIONAL: None},
+        "dims": ("category", "brand", "territory"),
+        "metrics": {
+            "aws": ("aws", "mean"),
+            "qtyKgRtm": ("qtyKgRtm", "sum"),
+            "valueSold": ("valueSold", "sum"),
+        },
+    },
+}
+
+
+class GeoRollup:
+    """Map metrics of one dataset at every geographic level, for every filter combination.
+
+    The rows are grouped once at the finest grain into additive components
+    (sums and counts); each level and each combination of filter values and
+    ALL is then summed from those, so a mean is exact at every level. `slice()`
+    is an index lookup. Frames are shared; treat them as read-only.
+    """
+
+    def __init__(self, df, levels, dims, metrics):
+        self.levels = dict(levels)
+        self.dims = tuple(d for d in dims if d in df.columns)
+        self.metrics = {name: (col, how) for name, (col, how) in metrics.items()
+                        if how == "count" or col in df.columns}
+        self.base = self._base(df)
+        self.frames = {level: self._level(level) for level in self.levels}
+
+    def _base(self, df):
+        """One pass over the rows: sums and counts per finest (dims, units) group."""
+        keys = list(dict.fromkeys([*self.dims, *(c for c in self.levels.values() if c)]))
+        grouped = df.groupby(keys, observed=True, dropna=False, sort=False)
+        parts = {"rows": grouped.size()}
+        for col in dict.fromkeys(col for col, how in self.metrics.values() if how != "count"):
+            parts[f"{col}.sum"] = grouped[col].sum()
+            parts[f"{col}.n"] = grouped[col].count()
+        base = pd.DataFrame(parts).reset_index()
+        # Labels become plain objects so ALL can sit next to real values
+        return base.astype({key: object for key in keys})
+
+    @property
+    def component_columns(self):
+        return list(self.base.columns[self.base.columns.get_loc("rows"):])
+
+    def metric_components(self):
+        """metric -> (sum column, count column); the count is None for additive metrics."""
+        return {
+            name: ("rows", None) if how == "count" else (f"{col}.sum", f"{col}.n" if how == "mean" else None)
+            for name, (col, how) in self.metrics.items()
+        }
+
+    def components(self, level, dims=None):
+        """Additive components per (dims, unit) of `level`, with no ALL rows."""
+        column = self.levels[level]
+        dims = self.dims if dims is None else dims
+        keys = list(dict.fromkeys([*dims, *([column] if column else [])]))
+        if keys:
+            part = self.base.groupby(keys, dropna=False, sort=False)[self.component_columns].sum().reset_index()
+        else:
+            part = self.base[self.component_columns].sum().to_frame().T
+        part["unit"] = part[column] if column else ALL
+        return part[[*dims, "unit", *self.component_columns]]
+
+    def _level(self, level):
+        pieces = []
+        for mask in itertools.product((True, False), repeat=len(self.dims)):
+            kept = [d for d, keep in zip(self.dims, mask) if keep]
+            part = self.components(level, kept)
+            for d in self.dims:
+                if d not in kept:
+                    part[d] = ALL
+            pieces.append(part[[*self.dims, "unit", *self.component_columns]])
+        frame = pd.concat(pieces, ignore_index=True)
+        out = frame[[*self.dims, "unit"]].copy()
+        for name, (total, count) in self.metric_components().items():
+            out[name] = frame[total] if count is None else frame[total] / frame[count].where(frame[count] > 0)
+        return out.set_index([*self.dims, "unit"]).sort_index()
+
+    def slice(self, level, by=(), **filters):
+        """Metrics per unit of `level` for one filter combination.
+
+        `filters` map dimensions to a value (None or absent = all values);
+        dimensions named in `by` come back as columns, one row per value.
+        The unit column is named after the level; the national level has none.
+        """
+        frame = self.frames[level]
+        key = tuple(
+            slice(None) if d in by else (ALL if filters.get(d) is None else filters[d])
+            for d in self.dims
+        )
+        try:
+            rows = (frame.loc[key, :] if key else frame).reset_index()
+        except KeyError:
+            rows = frame.iloc[0:0].reset_index()
+        for d in by:
+            rows = rows[rows[d] != ALL]
+        # A `by` dimension that is the level itself repeats the unit
+        columns = [d for d in by if d != level]
+        if level != NATIONAL:
+            columns.append(level)
+            rows = rows.drop(columns=[level], errors="ignore").rename(columns={"unit": level})
+        return rows[[*columns, *self.metrics]].reset_index(drop=True)
+
+
+def build_rollup(table, df):
+    """The GeoRollup of `df`, read from source `table` (see ROLLUP_SPECS)."""
+    spec = ROLLUP_SPECS[table]
+    return GeoRollup(df, spec["levels"], spec["dims"], spec["metrics"])
@@ -1,19 +1,22 @@
 import streamlit as st
 import json
+import logging
 import os
+import threading
 import pandas as pd
 
-from utils import get_first_present,to_key,slugify
+from utils import get_first_present,to_key,to_keys,slugify
+from utils.topojson import encode_topology
 
-@st.cache_data(show_spinner=False)
-def load_province_geojson(path: str):
-    """Load province GeoJSON and standardize properties"""
+def _read_geojson(path: str, kind: str):
     if not os.path.exists(path):
-        st.error(f"Province GeoJSON file not found: {path}")
-        st.stop()
-        
+        raise FileNotFoundError(f"{kind} GeoJSON file not found: {path}")
     with open(path, "r", encoding="utf-8") as f:
-        gj = json.load(f)
+        return json.load(f)
+
+def load_province_geojson(path: str):
+    """Load province GeoJSON and standardize properties"""
+    gj = _read_geojson(path, "Province")
     
     for feat in gj.get("features", []):
         props = feat.get("properties", {}) or {}
@@ -28,15 +31,9 @@ def load_province_geojson(path: str):
         feat["properties"] = props
     return gj
 
-@st.cache_data(show_spinner=False)
 def load_county_geojson(path: str):
     """Load county GeoJSON and standardize properties"""
-    if not os.path.exists(path):
-        st.error(f"County GeoJSON file not found: {path}")
-        st.stop()
-        
-    with open(path, "r", encoding="utf-8") as f:
-        gj = json.load(f)
+    gj = _read_geojson(path, "County")
     
     for feat in gj.get("features", []):
         props = feat.get("properties", {}) or {}
@@ -48,21 +45,162 @@ def load_county_geojson(path: str):
         feat["properties"] = props
     return gj
 
-@st.cache_data(show_spinner=False)
-def aggregate_brand_data_by_geography(df: pd.DataFrame, geo_level='province'):
-    """Aggregate brand data by geographic region (province/county level)"""
-    if df.empty:
-        return pd.DataFrame()
-    
-    # Group by market (assuming 'market' maps to geographic regions)
-    agg_data = df.groupby('market').agg({
-        'whiteSpaceScore': 'mean',
-        'marketShare': 'mean', 
-        'competitorStrength': 'mean',
-        'brandName': 'count'  # Count of brands per market
-    }).reset_index()
-    
-    agg_data.rename(columns={'brandName': 'brandCount'}, inplace=True)
-    agg_data['GEO_KEY'] = agg_data['market'].map(to_key)
-    
-    return agg_data
\ No newline at end of file
+def load_subcounty_geojson(path: str):
+    """Load sub-county GeoJSON and standardize properties"""
+    gj = _read_geojson(path, "Sub-county")
+
+    for feat in gj.get("features", []):
+        props = feat.get("properties", {}) or {}
+        name = get_first_present(props, ["shapeName","SUBCOUNTY","Subcounty","NAME_2","NAME","name"], "")
+        props["SUBCOUNTY_KEY"] = to_key(name)
+        feat["properties"] = props
+    return gj
+
+
+logger = logging.getLogger(__name__)
+
+
+# name -> (loader, path, normalized key property, property the maps use as featureidkey)
+BOUNDARY_SETS = {
+    "territories": (load_province_geojson, "storage/kenya_territories_lake.geojson", "PROV_KEY", "TERRITORY"),
+    "counties": (load_county_geojson, "storage/kenya.geojson", "COUNTY_KEY", "COUNTY_NAM"),
+    "subcounties": (load_subcounty_geojson, "storage/kenya-subcounties-simplified.geojson", "SUBCOUNTY_KEY", "shapeName"),
+}
+
+# Douglas-Peucker tolerances (degrees) of the variants built by
+# `python -m data_fetcher.simplify_boundaries` into storage/simplified.
+SIMPLIFY_LEVELS = {"high": 0.0025, "medium": 0.01, "low": 0.04}
+SIMPLIFIED_DIR = os.path.join("storage", "simplified")
+# TopoJSON grid per level: a step well under the tolerance (Kenya spans ~10 degrees)
+QUANTIZATION = {None: 100_000, "high": 100_000, "medium": 10_000, "low": 10_000}
+
+
+def simplified_path(path: str, level: str):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(SIMPLIFIED_DIR, f"{stem}.{level}.geojson")
+
+
+def level_for_zoom(zoom: float):
+    """Coarsest variant whose error stays under half a screen pixel at `zoom`
+    (512px map tiles), or None when only full detail will do."""
+    half_pixel = 360 / (512 * 2 ** zoom) / 2
+    fitting = [(tol, level) for level, tol in SIMPLIFY_LEVELS.items() if tol <= half_pixel]
+    return max(fitting)[1] if fitting else None
+
+
+class GeoRegistry:
+    """Every boundary set parsed and key-normalized once per process.
+
+    `get()` and `topology()` hand out the shared object itself, not a copy, so callers must
+    treat it as read-only; `features` is stored as a tuple to make accidental
+    appends fail loudly. Plotly copies the geojson into its own figure, so
+    building maps never touches the registry.
+    """
+
+    def __init__(self, sets=BOUNDARY_SETS):
+        self.sets = sets
+        self._geo = {}
+        self._topo = {}
+        self._lookup = {}
+        self._reported = set()
+        self._lock = threading.Lock()
+
+    def names(self):
+        return list(self.sets)
+
+    def resolutions(self):
+        """Every (name, level) the registry can serve; level None is full detail."""
+        return [(name, level) for name in self.sets for level in (None, *SIMPLIFY_LEVELS)]
+
+    def get(self, name, level=None):
+        """Boundary set `name` at simplification `level`, falling back to full detail
+        when that variant has not been built."""
+        geo = self._geo.get((name, level))
+        if geo is None:
+            with self._lock:
+                geo = self._geo.get((name, level))
+                if geo is None:
+                    loader, path, *_ = self.sets[name]
+                    if level is not None and os.path.exists(simplified_path(path, level)):
+                        path = simplified_path(path, level)
+                    geo = loader(path)
+                    geo["features"] = tuple(geo.get("features", []))
+                    self._geo[(name, level)] = geo
+        return geo
+
+    def topology(self, name, level=None):
+        """Quantized TopoJSON of `get(name, level)`, encoded once and carrying
+        only the normalized key and featureidkey properties."""
+        topo = self._topo.get((name, level))
+        if topo is None:
+            geo = self.get(name, level)
+            with self._lock:
+                topo = self._topo.get((name, level))
+                if topo is None:
+                    topo = encode_topology(geo, QUANTIZATION[level], properties=self.sets[name][2:])
+                    self._topo[(name, level)] = topo
+        return topo
+
+    def topology_for_zoom(self, name, zoom):
+        return self.topology(name, level_for_zoom(zoom))
+
+    def keys(self, name):
+        """Normalized location keys of `name`, in feature order."""
+        key = self.sets[name][2]
+        return [feat["properties"][key] for feat in self.get(name)["features"]]
+
+    def lookup(self, name):
+        """Canonical key -> featureidkey value of every polygon in `name`.
+
+        Every feature is indexed under its normalized key and under the key of
+        its featureidkey value, so either spelling of a boundary file joins.
+        """
+        table = self._lookup.get(name)
+        if table is None:
+            key, feature_prop = self.sets[name][2:]
+            table = {}
+            for feat in self.get(name)["features"]:
+                props = feat["properties"]
+                for k in (props[key], to_key(props.get(feature_prop))):
+                    if k:
+                        table.setdefault(k, props.get(feature_prop))
+            self._lookup[name] = table
+        return table
+
+    def locations(self, name, values):
+        """Map data location names onto `name`'s featureidkey values, so they
+        join regardless of case and punctuation. Values with no polygon are
+        passed through unchanged (and logged once)."""
+        values = pd.Series(values)
+        matched = to_keys(values).map(self.lookup(name))
+        missing = matched.isna() & values.notna()
+        if missing.any():
+            self._report(name, values[missing])
+        return matched.where(~missing, values)
+
+    def unmatched(self, name, values, rows=None):
+        """Data location names that match no polygon of `name`: one row per
+        distinct value with its canonical key and row count, most rows first.
+        `rows` gives the row count behind each value when they are pre-grouped."""
+        values = pd.Series(values, name="value").reset_index(drop=True)
+        rows = pd.Series(1 if rows is None else pd.Series(rows).to_numpy(), index=values.index, name="rows")
+        keys = to_keys(values)
+        missing = (~keys.isin(self.lookup(name).keys())).to_numpy()
+        report = (
+            pd.DataFrame({"value": values[missing], "key": keys[missing], "rows": rows[missing]})
+            .groupby(["value", "key"], dropna=False)["rows"].sum()
+            .sort_values(ascending=False).reset_index()
+        )
+        return report
+
+    def _report(self, name, values):
+        new = {v for v in values.unique() if (name, v) not in self._reported}
+        if new:
+            self._reported.update((name, v) for v in new)
+            logger.warning("No %s polygon for %s; these rows are not drawn", name, sorted(map(str, new)))
+
+
+@st.cache_resource(show_spinner=False)
+def get_geo_registry():
+    """The process-wide GeoRegistry, shared by every session."""
+    return GeoRegistry()
@@ -1,41 +1,70 @@
-import pandas as pd
-from config import load_engine
+from .contracts import apply_dtypes, columns_for
+from .query_builder import DateWindow, build_select, read_query, resolve_latest_periods
+from .snapshot_store import get_snapshot_store
+from .streaming import read_sql_chunked
 
 
+GT_TABLES = ("gt_data_pwani", "gt_competitor_data")
 
 
-# --- DB Engine ---
-engine = load_engine()
+class DataReaderGT:
 
+    def __init__(self, snapshots=None):
+        self.snapshots = snapshots if snapshots is not None else get_snapshot_store()
+        self._latest = None
 
+    def latest_periods(self):
+        """Latest `date` of the GT pwani and competitor tables.
 
+        Resolved once per reader (one round trip, or the snapshot watermarks)
+        and reused by both the pwani and the competitor query.
+        """
+        if self._latest is None:
+            if self.snapshots is not None:
+                for table in GT_TABLES:
+                    self.snapshots.ensure(table)
+                self._latest = {table: self.snapshots.watermark(table) for table in GT_TABLES}
+            else:
+                self._latest = resolve_latest_periods(GT_TABLES)
+        return self._latest
 
-class DataReaderGT:
+    def latest_window(self, table):
+        latest = self.latest_periods()[table]
+        if latest is None:
+            raise ValueError(f"No dated rows in {table}")
+        return DateWindow.day(latest)
 
-    def read_gt_pwani_data(self):
-        query = """
-            SELECT *
-            FROM pwani_marketing.gt_data_pwani
-            WHERE date = (SELECT MAX(date) FROM pwani_marketing.gt_data_pwani)
-        """
-      
-        data = pd.read_sql(query, engine)
-        return data
+    def _read_window(self, table, view, window):
+        """Rows of `table` in `window` (default: its latest date), projected to the view's columns."""
+        if window is None:
+            window = self.latest_window(table)  # refreshes the GT snapshots on the way
+        elif self.snapshots is not None:
+            self.snapshots.ensure(table)
+        columns = columns_for(table, view)
+        if self.snapshots is not None:
+            df = self.snapshots.read(table, columns=columns, filters=window.parquet_filters())
+            return apply_dtypes(df, table)
+
+        query, params = build_select(table, columns, window)
+        return apply_dtypes(read_query(query, params), table)
+
+    def read_gt_pwani_data(self, view=None, window=None):
+        return self._read_window("gt_data_pwani", view, window)
    
 
-    def read_gt_competitor_data(self):
-        query = """
-            SELECT *
-            FROM pwani_marketing.gt_competitor_data
-            WHERE date = (SELECT MAX(date) FROM pwani_marketing.gt_competitor_data)
-        """
-        
-        df = pd.read_sql(query, engine)
-        return df
+    def read_gt_competitor_data(self, view=None, window=None):
+        return self._read_window("gt_competitor_data", view, window)
     
 
-    def read_rtm_data(self):
-        query = "SELECT * FROM pwani_marketing.rtm_data_cleaned"
-        df = pd.read_sql(query, engine)
-        return df
+    def read_rtm_data(self, view=None, window=None):
+        """rtm_data_cleaned streamed in chunks with categorical text and compact numerics."""
+        table = "rtm_data_cleaned"
+        columns = columns_for(table, view)
+        if self.snapshots is not None:
+            filters = window.parquet_filters() if window is not None else None
+            df = self.snapshots.load(table, columns=columns, filters=filters)
+            return apply_dtypes(df, table)
+
+        query, params = build_select(table, columns, window)
+        return read_sql_chunked(query, table, params=params)
 
@@ -1,35 +1,30 @@
-import pandas as pd
-from config import load_engine
-from sqlmodel import create_engine
-from datetime import datetime, timedelta
+from .contracts import apply_dtypes, columns_for
+from .query_builder import DateWindow, build_select, read_query
+from .snapshot_store import get_snapshot_store
 
 
 
-# --- DB Engine ---
-engine=load_engine()
+class DataReaderMt:
+    """MT readers. Rows are limited to a DateWindow, the current year unless the caller picks another."""
 
+    def __init__(self, snapshots=None, window=None):
+        self.snapshots = snapshots if snapshots is not None else get_snapshot_store()
+        self.window = window
 
+    def _read_window(self, table, view, window):
+        window = window or self.window or DateWindow.year()
+        columns = columns_for(table, view)
+        if self.snapshots is not None:
+            df = self.snapshots.load(table, columns=columns, filters=window.parquet_filters())
+            return apply_dtypes(df, table)
 
-class DataReaderMt:
+        query, params = build_select(table, columns, window)
+        return apply_dtypes(read_query(query, params), table)
+
+    def read_mt_pwani_data(self, view=None, window=None):
+        """MT pwani data in `window`; `view` restricts it to that page's column contract."""
+        return self._read_window("mt_pwani_data_cleaned", view, window)
 
-    def read_mt_pwani_data(self):
-        current_year = datetime.now().year
-
-        query = f"""
-            SELECT *
-            FROM pwani_marketing.mt_pwani_data_cleaned
-            WHERE YEAR(date) = {current_year}
-        """
-        data = pd.read_sql_query(query, engine)
-        return data
-
-    def read_mt_competitor_data(self):
-        current_year = datetime.now().year
-
-        query = f"""
-            SELECT *
-            FROM pwani_marketing.mt_competitor_data_cleaned
-            WHERE YEAR(date) = {current_year}
-        """
-        df = pd.read_sql_query(query, engine)
-        return df
+    def read_mt_competitor_data(self, view=None, window=None):
+        """MT competitor data in `window`; `view` restricts it to that page's column contract."""
+        return self._read_window("mt_competitor_data_cleaned", view, window)
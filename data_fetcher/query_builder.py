@@ -0,0 +1,115 @@
+import pandas as pd
+from sqlalchemy import text
+from datetime import datetime
+
+from config import connect
+from .contracts import TABLE_DTYPES, select_list
+
+
+SCHEMA = "pwani_marketing"
+
+
+class DateWindow:
+    """Half-open `[start, end)` range on the `date` column.
+
+    Rendered as `date >= :start AND date < :end` so MySQL can use an index on
+    `date`, unlike `YEAR(date) = ...` or a correlated `MAX(date)` subquery.
+    """
+
+    def __init__(self, start, end):
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end)
+
+    def __repr__(self):
+        return f"DateWindow({self.start.date()}, {self.end.date()})"
+
+    def __eq__(self, other):
+        return isinstance(other, DateWindow) and (self.start, self.end) == (other.start, other.end)
+
+    def __hash__(self):
+        return hash((self.start, self.end))
+
+    @classmethod
+    def year(cls, year=None):
+        year = year or datetime.now().year
+        return cls(pd.Timestamp(year, 1, 1), pd.Timestamp(year + 1, 1, 1))
+
+    @classmethod
+    def month(cls, year, month):
+        start = pd.Timestamp(year, month, 1)
+        return cls(start, start + pd.offsets.MonthBegin(1))
+
+    @classmethod
+    def day(cls, day):
+        start = pd.Timestamp(day).normalize()
+        return cls(start, start + pd.Timedelta(days=1))
+
+    @classmethod
+    def last_months(cls, n, anchor=None):
+        """The `n` calendar months ending with the month of `anchor` (default: today)."""
+        anchor = pd.Timestamp(anchor or datetime.now())
+        end = anchor.normalize().replace(day=1) + pd.offsets.MonthBegin(1)
+        return cls(end - pd.offsets.MonthBegin(n), end)
+
+    def sql(self, column="date", name=""):
+        """Predicate text; `name` prefixes the bind parameters when a query holds several windows."""
+        return f"{column} >= :{name}start AND {column} < :{name}end"
+
+    def params(self, name=""):
+        return {f"{name}start": self.start.to_pydatetime(), f"{name}end": self.end.to_pydatetime()}
+
+    def parquet_filters(self, column="date"):
+        return [(column, ">=", self.start), (column, "<", self.end)]
+
+
+def build_select(table, columns=None, window=None, where=()):
+    """Parameterized `SELECT` for `table` with an optional projection and date window.
+
+    Returns `(sql, params)`; extra `where` clauses are ANDed as given.
+    """
+    clauses = list(where)
+    params = {}
+    if window is not None:
+        clauses.insert(0, window.sql())
+        params.update(window.params())
+    sql = f"SELECT {select_list(columns)} FROM {SCHEMA}.{table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    return sql, params
+
+
+def read_query(sql, params=None):
+    """Run a parameterized query on the shared engine and return a DataFrame."""
+    with connect() as conn:
+        return pd.read_sql(text(sql), conn, params=params)
+
+
+def resolve_latest_periods(tables):
+    """`MAX(date)` of each table in a single round trip, as {table: Timestamp or None}."""
+    selects = ", ".join(
+        f"(SELECT MAX(date) FROM {SCHEMA}.{table}) AS `{table}`" for table in tables
+    )
+    row = read_query(f"SELECT {selects}").iloc[0]
+    return {table: (None if pd.isna(row[table]) else pd.Timestamp(row[table])) for table in tables}
+
+
+def probe_tables(tables):
+    """Cheap freshness fingerprint per table: `MAX(date)` and `COUNT(*)` in one round trip.
+
+    Returns {table: {"watermark": Timestamp or None, "rows": int}}; tables
+    without a `date` column only report their row count.
+    """
+    selects = " UNION ALL ".join(
+        f"SELECT '{table}' AS tbl, "
+        f"{'MAX(date)' if 'date' in TABLE_DTYPES.get(table, {}) else 'NULL'} AS watermark, "
+        f"COUNT(*) AS row_count FROM {SCHEMA}.{table}"
+        for table in tables
+    )
+    rows = read_query(selects)
+    return {
+        row.tbl: {
+            "watermark": None if pd.isna(row.watermark) else pd.Timestamp(row.watermark),
+            "rows": int(row.row_count),
+        }
+        for row in rows.itertuples(index=False)
+    }
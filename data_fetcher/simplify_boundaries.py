@@ -0,0 +1,47 @@
+"""Build the simplified boundary variants under storage/simplified.
+
+    python -m data_fetcher.simplify_boundaries
+
+Re-run whenever a file in storage/ changes; the registry falls back to the
+full-detail file for any variant that is missing. The report compares the
+GeoJSON and quantized TopoJSON payload size of every variant.
+"""
+import json
+import math
+import os
+
+from utils.geometry import simplify_features, vertex_count
+from utils.topojson import dumps, encode_topology
+from .geojson_fetcher import BOUNDARY_SETS, QUANTIZATION, SIMPLIFY_LEVELS, simplified_path
+
+
+def build(levels=SIMPLIFY_LEVELS):
+    report = []
+    for name, (_, path, *properties) in BOUNDARY_SETS.items():
+        with open(path, "r", encoding="utf-8") as f:
+            gj = json.load(f)
+        variants = {None: gj}
+        for level, tolerance in levels.items():
+            # Keep about a tenth of the tolerance in precision
+            decimals = max(0, math.ceil(-math.log10(tolerance)) + 1)
+            variants[level] = {**gj, "features": simplify_features(gj["features"], tolerance, decimals)}
+            out = simplified_path(path, level)
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(dumps(variants[level]))
+        for level, variant in variants.items():
+            report.append({
+                "boundaries": name,
+                "level": level or "full",
+                "vertices": vertex_count(variant["features"]),
+                "geojson_bytes": len(dumps(variant).encode()),
+                "topojson_bytes": len(dumps(encode_topology(variant, QUANTIZATION[level], properties)).encode()),
+            })
+    return report
+
+
+if __name__ == "__main__":
+    for row in build():
+        print(f"{row['boundaries']:12} {row['level']:7} vertices {row['vertices']:>6}   "
+              f"GeoJSON {row['geojson_bytes']:>9,}   TopoJSON {row['topojson_bytes']:>9,}   "
+              f"({row['topojson_bytes'] / row['geojson_bytes']:.0%})")
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from config import load_snapshot_dir
+from .query_builder import SCHEMA
+from .streaming import concat_compact, read_sql_chunked
+
+
+logger = logging.getLogger(__name__)
+
+
+WATERMARK_COLUMN = "date"
+
+# Tables mirrored to disk. Tables without a `date` column are re-pulled in
+# full once their snapshot is older than FULL_REFRESH_SECONDS.
+SNAPSHOT_TABLES = (
+    "mt_pwani_data_cleaned",
+    "mt_competitor_data_cleaned",
+    "gt_data_pwani",
+    "gt_competitor_data",
+    "rtm_data_cleaned",
+    "target_audience_territory",
+)
+FULL_REFRESH_SECONDS = int(os.getenv("SNAPSHOT_FULL_REFRESH_SECONDS", 24 * 3600))
+
+
+class SnapshotStore:
+    """Parquet mirror of the pwani_marketing tables under storage/.
+
+    Each table is stored as `<table>.parquet` next to a `_manifest.json` that
+    records the `date` watermark. A refresh only pulls the undated rows and
+    those with `date >= watermark`, replacing the last (possibly partial)
+    period, so cache misses read from local columnar files instead of
+    scanning MySQL.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._locks = {table: threading.Lock() for table in SNAPSHOT_TABLES}
+        self._manifest_lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, table):
+        return os.path.join(self.root, f"{table}.parquet")
+
+    # -------------------- Manifest --------------------
+    def _manifest_path(self):
+        return os.path.join(self.root, "_manifest.json")
+
+    def manifest(self):
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _update_manifest(self, table, entry):
+        with self._manifest_lock:
+            manifest = self.manifest()
+            manifest[table] = entry
+            tmp = self._manifest_path() + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp, self._manifest_path())
+
+    # -------------------- Refresh --------------------
+    def refresh(self, table, full=False):
+        """Bring the snapshot of `table` up to date and return the number of rows pulled."""
+        if table not in self._locks:
+            raise ValueError(f"Unknown snapshot table: {table}")
+
+        with self._locks[table]:
+            entry = self.manifest().get(table, {})
+            exists = os.path.exists(self.path(table))
+            watermark = entry.get("watermark")
+
+            if exists and not full and watermark is None:
+                if time.time() - entry.get("refreshed_at", 0) < FULL_REFRESH_SECONDS:
+                    return 0
+                full = True
+
+            if not exists or full or watermark is None:
+                fresh = read_sql_chunked(f"SELECT * FROM {SCHEMA}.{table}", table)
+                combined = _normalize_dates(fresh)
+            else:
+                # Undated rows have no place relative to the watermark: every
+                # incremental pull re-reads them instead of keeping them
+                fresh = read_sql_chunked(
+                    f"SELECT * FROM {SCHEMA}.{table} "
+                    f"WHERE {WATERMARK_COLUMN} >= :watermark OR {WATERMARK_COLUMN} IS NULL",
+                    table,
+                    params={"watermark": pd.Timestamp(watermark).to_pydatetime()},
+                )
+                fresh = _normalize_dates(fresh)
+                kept = pd.read_parquet(
+                    self.path(table),
+                    filters=[(WATERMARK_COLUMN, "<", pd.Timestamp(watermark))],
+                )
+                combined = concat_compact([kept, fresh]) if len(fresh) else kept
+
+            self._write(table, combined)
+
+            new_watermark = None
+            if WATERMARK_COLUMN in combined.columns and combined[WATERMARK_COLUMN].notna().any():
+                new_watermark = combined[WATERMARK_COLUMN].max().isoformat()
+
+            self._update_manifest(table, {
+                "watermark": new_watermark,
+                "rows": int(len(combined)),
+                "refreshed_at": time.time(),
+            })
+            return len(fresh)
+
+    def _write(self, table, df):
+        tmp = self.path(table) + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, self.path(table))
+
+    # -------------------- Read --------------------
+    def read(self, table, columns=None, filters=None):
+        """Read a snapshot from disk, optionally projecting columns and pushing down row filters."""
+        return pd.read_parquet(self.path(table), columns=columns, filters=filters)
+
+    def watermark(self, table):
+        """Latest `date` held in the snapshot of `table`, or None."""
+        watermark = self.manifest().get(table, {}).get("watermark")
+        return pd.Timestamp(watermark) if watermark else None
+
+    def ensure(self, table):
+        """Refresh `table` incrementally; if MySQL is unreachable keep serving the existing snapshot."""
+        try:
+            self.refresh(table)
+        except Exception as e:
+            if not os.path.exists(self.path(table)):
+                raise
+            logger.warning("Snapshot refresh failed for %s, serving stale copy: %s", table, e)
+
+    def reconcile(self, table, rows):
+        """Refresh `table` after a detected change; re-pull it in full if the
+        incremental pull still disagrees with the source row count (rows
+        inserted or deleted behind the watermark, or an undated table)."""
+        self.refresh(table)
+        if self.manifest().get(table, {}).get("rows") != rows:
+            self.refresh(table, full=True)
+
+    def load(self, table, columns=None, filters=None):
+        """Refresh `table`, then serve it from disk."""
+        self.ensure(table)
+        return self.read(table, columns=columns, filters=filters)
+
+
+def _normalize_dates(df):
+    """Store `date` as datetime64 so Parquet filters and watermarks compare consistently."""
+    if WATERMARK_COLUMN in df.columns:
+        df[WATERMARK_COLUMN] = pd.to_datetime(df[WATERMARK_COLUMN])
+    return df
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store():
+    """Process-wide SnapshotStore, or None when snapshots are disabled."""
+    global _store
+    root = load_snapshot_dir()
+    if root is None:
+        return None
+    with _store_lock:
+        if _store is None or _store.root != root:
+            _store = SnapshotStore(root)
+        return _store
@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy import text
+
+from config import connect
+from .contracts import apply_dtypes
+
+
+CHUNK_SIZE = int(os.getenv("SQL_CHUNK_SIZE", 50_000))
+
+
+def concat_compact(frames):
+    """Concatenate frames without losing categoricals.
+
+    `pd.concat` falls back to object dtype when the categories of two chunks
+    differ, so categorical columns are merged with `union_categoricals` first.
+    """
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = list(frames[0].columns)
+    cat_cols = [c for c in columns if isinstance(frames[0][c].dtype, pd.CategoricalDtype)]
+    merged = {
+        col: union_categoricals([f[col] for f in frames], ignore_order=True)
+        for col in cat_cols
+    }
+    out = pd.concat([f.drop(columns=cat_cols) for f in frames], ignore_index=True)
+    for col in cat_cols:
+        out[col] = merged[col]
+    return out[columns]
+
+
+def read_sql_chunked(query, table, params=None, chunksize=CHUNK_SIZE):
+    """Stream a query through a server-side cursor and compact each chunk.
+
+    Every chunk is cast to the declared dtypes of `table` (categoricals for
+    repetitive strings, narrowest numerics, parsed `date`) before the next one
+    is fetched, so peak memory stays close to the size of the compact result.
+    """
+    chunks = []
+    with connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        for chunk in pd.read_sql_query(text(query), conn, params=params, chunksize=chunksize):
+            chunks.append(apply_dtypes(chunk, table))
+    return concat_compact(chunks)
@@ -1,19 +1,15 @@
-import pandas as pd
-from config import load_engine
+from .contracts import apply_dtypes, columns_for
+from .query_builder import build_select, read_query
+from .snapshot_store import get_snapshot_store
 
 
+def read_target_audience(view=None):
+    table = "target_audience_territory"
+    columns = columns_for(table, view)
+    snapshots = get_snapshot_store()
+    if snapshots is not None:
+        return apply_dtypes(snapshots.load(table, columns=columns), table)
 
-
-# --- DB Engine ---
-engine = load_engine()
-
-
-
-
-
-def read_target_audience():
-    query = "SELECT * FROM pwani_marketing.target_audience_territory"
-    data = pd.read_sql_query(query, engine)
-
-    return data
+    query, params = build_select(table, columns)
+    return apply_dtypes(read_query(query, params), table)
 
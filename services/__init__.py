@@ -1 +1,10 @@
-from .backend import fetch_report,run_backend_sync
\ No newline at end of file
+from .backend import fetch_report,run_backend_sync
+from .loading import load_concurrently
+from .datasets import load_page_data,load_topology,PWANI_TABLES,COMPETITOR_TABLES
+from .freshness import get_freshness_monitor
+from .warmup import get_cache_warmer
+from .filter_index import market_discovery_index,content_generation_index,filter_index_version,cascade_payload
+from .rollups import geo_rollup,rollup_version,fits_client_cube,map_cube,kpi_cube,kpi_version,distributor_ranking,rtm_by_territory,unmatched_locations
+from .static_assets import get_static_assets
+from .choropleth import choropleth_map
+from .cards import card_list
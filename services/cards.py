@@ -0,0 +1,94 @@
+import streamlit as st
+
+from utils.cards import bar_width, render_cards
+
+
+# Ranked card lists of the Market Discovery pages: kind -> (style, card template,
+# bar width). Each list goes to the page as one HTML block, one markdown delta.
+
+_BRAND_CARD = """
+<div class="brand-card{modifier}">
+    <strong>{{brandName}} {{category}}</strong> - <em>{{market}}</em> |
+    Category: {{category}}<br>
+    White Space Score: <strong>{{whiteSpaceScore:.1f}}%</strong> |
+    Market Share: <strong>{{marketShare:.1f}}%</strong>
+    <div style="background: #E5E7EB; height: 8px; border-radius: 4px; margin-top: 8px;">
+        <div style="background: linear-gradient(to right, {start}, {end});
+                    height: 8px; width: {{width:.1f}}%; border-radius: 4px;"></div>
+    </div>
+</div>
+"""
+
+_BRAND_STYLE = """
+<style>
+.brand-card{
+    padding:10px !important;
+    background: #eee;
+}
+</style>
+"""
+
+CARD_LISTS = {
+    "top_brands": (
+        _BRAND_STYLE,
+        _BRAND_CARD.format(modifier="", start="#10B981", end="#059669"),
+        lambda df: bar_width(100 - df["whiteSpaceScore"], scale=100),
+    ),
+    "bottom_brands": (
+        _BRAND_STYLE,
+        _BRAND_CARD.format(modifier=" poor-brand-card", start="#EF4444", end="#DC2626"),
+        lambda df: bar_width(100 - df["whiteSpaceScore"], scale=100),
+    ),
+    "counties": (
+        "",
+        """
+<div style="background: #eee; padding: 12px !important; margin: 8px 0; border-radius: 8px;
+            border-left: 4px solid #3B82F6; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+    <div style="display: flex; justify-content: space-between; align-items: center;">
+        <span style="background: linear-gradient(to right, #3B82F6, #06B6D4); color: white;
+                    padding: 4px 8px; border-radius: 4px; font-weight: bold; font-size: 12px;">{rank}</span>
+        <div style="flex-grow: 1; margin-left: 12px;">
+            <strong>{county}</strong><br>
+            <small>Volume: {qtyKgRtm:.2f} Kg • AWS: {aws:.1f}%</small>
+            <div style="background: #E5E7EB; height: 4px; border-radius: 2px; margin-top: 4px;">
+                <div style="background: linear-gradient(to right, #3B82F6, #06B6D4); height: 4px; width: {width:.1f}%; border-radius: 2px;"></div>
+            </div>
+        </div>
+    </div>
+</div>
+""",
+        lambda df: bar_width(df["qtyKgRtm"]),
+    ),
+    "distributors": (
+        """
+<style>
+.distributor-card {
+padding:10px !important
+}
+</style>
+""",
+        """
+<div class="distributor-card">
+    <strong>{distributorName}</strong> <small>({territory})</small><br>
+    <div style="display: flex; justify-content: space-between; margin: 4px 0;">
+        <span>Sales: <strong style="color: #059669;">KES {valueSold:,.0f}</strong></span>
+        <span>Coverage: <strong style="color: #3B82F6;">{customerName} customers</strong></span>
+    </div>
+    <div style="background: #E5E7EB; height: 4px; border-radius: 2px; margin-top: 4px;">
+        <div style="background: linear-gradient(to right, #10B981, #059669); height: 4px; width: {width:.1f}%; border-radius: 2px;"></div>
+    </div>
+</div>
+""",
+        lambda df: bar_width(df["valueSold"]),
+    ),
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def card_list(kind, frame):
+    """The ranked rows of `frame` as one HTML block of `kind` cards (see CARD_LISTS).
+    Cached on the contents of `frame`, so an unchanged ranking is not re-rendered."""
+    style, template, width = CARD_LISTS[kind]
+    if frame.empty:
+        return ""
+    return style + render_cards(template, frame.assign(width=width(frame)))
@@ -0,0 +1,66 @@
+import json
+import os
+
+import streamlit.components.v1 as components
+from plotly.utils import PlotlyJSONEncoder
+
+from .static_assets import get_static_assets
+
+
+FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "choropleth_frontend")
+
+_choropleth = components.declare_component("choropleth", path=FRONTEND_DIR)
+
+
+def _plain(obj):
+    """JSON-ready copy of figure data: numpy and pandas values become lists, NaN becomes null."""
+    return json.loads(json.dumps(obj, cls=PlotlyJSONEncoder))
+
+
+def choropleth_map(fig, topology, key, layers=None, layers_url=None, layer=None, cube=None, height=400, on_change=None):
+    """Show `fig` (one choropleth trace, no geojson) in a map that stays mounted across reruns.
+
+    The boundaries come from the `topology` URL and plotly.js is loaded once
+    per map, not once per rerun. On a rerun the map compares the new figure
+    with what it shows and restyles only what changed (z, locations, titles);
+    it is redrawn only when the boundaries change. `key` must be stable.
+
+    `layers` ({id: {"label", "trace"}}) fill the map's ☰ menu; a layer's
+    `trace` settings (e.g. z, colorscale, "colorbar.title.text") are applied
+    over the figure's trace. More layers can be fetched from `layers_url`, a
+    JSON file of the same shape in which z may be base64 float32. `layer` is
+    the one shown first; a layer the user picked stays selected while it is
+    offered.
+
+    `cube` filters the map in the browser: {"data": a services.map_cube
+    payload, "filters": {dimension: value or None}, "labels": {dimension:
+    label of "all values"} for the filters offered on the map, "layers":
+    {id: {"label", "metric", "title"}}, optionally "rank": {"by", "metric",
+    "top"} for one layer per top value of a dimension}. The cube layers are
+    computed from the filters in the browser, so the figure's locations must
+    be the cube's. With "cascade" (a services.cascade_payload), the filter
+    bar offers the app's cascade instead of the cube's values: a dimension
+    lists options only once the ones before it are picked, and the filters
+    handed back cover every cascade dimension.
+    The map starts from `filters` (or the cascade selection) on every rerun.
+
+    Returns {"click": the last clicked region as {"location", "name", "z",
+    "layer"}, "filters": the map's cube filters, "events"}, or None before
+    the first click or filter change; `on_change` runs on each of them.
+    """
+    assets = get_static_assets()
+    return _choropleth(
+        figure=_plain(fig.to_plotly_json()),
+        topology=topology,
+        layers=_plain(layers or {}),
+        layers_url=layers_url,
+        layer=layer,
+        cube=_plain(cube) if cube is not None else None,
+        height=height,
+        plotly_js=assets.plotly_js(),
+        topojson_js=assets.topojson_js(),
+        cube_js=assets.cube_js() if cube is not None else None,
+        key=key,
+        on_change=on_change,
+        default=None,
+    )
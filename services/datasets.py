@@ -0,0 +1,131 @@
+import pandas as pd
+import streamlit as st
+
+from data_fetcher import (
+    AggregateReader,
+    DataReaderGT,
+    DataReaderMt,
+    get_geo_registry,
+    read_target_audience,
+)
+from .freshness import version_token
+from .loading import load_concurrently
+
+
+# Module-level so every session and the warm-up thread share the same cache entries.
+# Loaders raise on failure; Streamlit never caches an exception. The trailing
+# `version` argument is only a cache key: the token of the source tables from the
+# freshness monitor, so a loader misses its cache exactly when its tables change.
+#
+# Row-level datasets are st.cache_resource rather than st.cache_data: every session
+# gets the one cached frame by reference instead of unpickling a full copy on each
+# call. Pages receive it through `shared_frame`, so a change made by one session
+# never reaches the cache. max_entries drops the frames of superseded versions.
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_rtm_data(view, version=None):
+    return DataReaderGT().read_rtm_data(view)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_brand_data(data, view, version=None):
+    """Load brand data restricted to the column contract of `view` (see data_fetcher.contracts)"""
+    if data == 'MT':
+        return DataReaderMt().read_mt_pwani_data(view)
+    elif data == "GT":
+        return DataReaderGT().read_gt_pwani_data(view)
+    raise ValueError("Invalid data type. Expected 'MT' or 'GT'.")
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_competitor_data(data, view, version=None):
+    """Load competitor data for MT or GT"""
+    if data == 'MT':
+        return DataReaderMt().read_mt_competitor_data(view)
+    elif data == "GT":
+        return DataReaderGT().read_gt_competitor_data(view)
+    raise ValueError("Invalid data type. Expected 'MT' or 'GT'.")
+
+
+@st.cache_data(show_spinner=False)
+def load_summary_aggregates(data, version=None):
+    """KPI rollups for the summary page, aggregated in SQL"""
+    return AggregateReader(data).summary()
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_gt_data(version=None):
+    return DataReaderGT().read_gt_pwani_data("content_generation")
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_target_audience(version=None):
+    return read_target_audience("detail")
+
+
+def shared_frame(value):
+    """A cached dataset as handed to a page: for a DataFrame, a copy-on-write view (pandas>=3)
+    that shares the cached columns until the page writes to it; anything else as is."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    return value
+
+
+def load_topology(name, zoom=None, level=None):
+    """Shared boundary set from the process-wide registry, simplified to what is
+    visible at `zoom` when one is given, as quantized TopoJSON for the map component."""
+    registry = get_geo_registry()
+    if zoom is not None:
+        return registry.topology_for_zoom(name, zoom)
+    return registry.topology(name, level)
+
+
+LOAD_ERRORS = {
+    "summary": "⚠️ Could not load summary data ({data}). Error: {e}. Please try again.",
+    "rtm": "⚠️ Failed to load RTM data due to: {e}. Please try again.",
+    "brand": "⚠️ Could not load brand data ({data}). Error: {e}. Please try again.",
+    "competitor": "⚠️ Failed to load competitor data ({data}). Error: {e}. Please try again.",
+    "gt": "⚠️ Could not load GT data due to: {e}. Please try again.",
+    "target_audience": "⚠️ Could not load target audience data due to: {e}. Please try again.",
+}
+
+
+PWANI_TABLES = {"MT": "mt_pwani_data_cleaned", "GT": "gt_data_pwani"}
+COMPETITOR_TABLES = {"MT": "mt_competitor_data_cleaned", "GT": "gt_competitor_data"}
+
+
+def page_tasks(view, data, versions=None):
+    """The loaders each page needs, as {name: (callable, args)}, keyed on the current `versions`."""
+    versions = versions or {}
+
+    def token(*tables):
+        return version_token(versions, *tables)
+
+    pwani, competitor = PWANI_TABLES.get(data), COMPETITOR_TABLES.get(data)
+    if view == "summary":
+        return {"summary": (load_summary_aggregates, (data, token(pwani, competitor)))}
+    if view == "detail":
+        return {
+            "rtm": (load_rtm_data, (view, token("rtm_data_cleaned"))),
+            "brand": (load_brand_data, (data, view, token(pwani))),
+            "competitor": (load_competitor_data, (data, view, token(competitor))),
+            "target_audience": (load_target_audience, (token("target_audience_territory"),)),
+        }
+    return {
+        "rtm": (load_rtm_data, (view, token("rtm_data_cleaned"))),
+        "gt": (load_gt_data, (token("gt_data_pwani"),)),
+    }
+
+
+def load_page_data(view, data, versions=None):
+    """Load everything `view` needs concurrently; failed loads warn and come back as None."""
+
+    def guarded(name, fn, args):
+        try:
+            return shared_frame(fn(*args))
+        except Exception as e:
+            st.warning(LOAD_ERRORS[name].format(data=data, e=e))
+            return None
+
+    tasks = {name: (guarded, (name, fn, args)) for name, (fn, args) in page_tasks(view, data, versions).items()}
+    return load_concurrently(tasks, label=f"Loading {data} data")
@@ -0,0 +1,79 @@
+import streamlit as st
+
+from .datasets import PWANI_TABLES
+from .freshness import version_token
+
+
+def cascade_index(sources):
+    """Option lists for a chain of dependent selectboxes, keyed by the selections above them.
+
+    `sources` is a list of `(df, columns)` pairs whose columns describe the
+    same levels (e.g. category, brand, territory). An option is kept only if
+    every source has it under the same parents, so
+    `index[()]` lists the first level, `index[(a,)]` the second level under
+    `a`, `index[(a, b)]` the third, and so on. Missing keys mean no options.
+    """
+    depth = len(sources[0][1])
+    index = {}
+    for level in range(1, depth + 1):
+        keys = None
+        for df, columns in sources:
+            frame = df[list(columns[:level])].dropna().drop_duplicates()
+            found = set(frame.itertuples(index=False, name=None))
+            keys = found if keys is None else keys & found
+        children = {}
+        for key in keys:
+            children.setdefault(key[:-1], []).append(key[-1])
+        index.update({parent: sorted(values) for parent, values in children.items()})
+    index.setdefault((), [])
+    return index
+
+
+# The frames are excluded from hashing (leading underscore): the data version
+# in the key already identifies them, so a rerun never rescans them.
+
+@st.cache_data(show_spinner=False)
+def market_discovery_index(data, version, _brand_df, _rtm_df=None):
+    """category -> brand -> territory options; GT keeps only what RTM also covers."""
+    if data == "MT":
+        return cascade_index([(_brand_df, ("category", "brandName", "territory"))])
+    return cascade_index([
+        (_brand_df, ("category", "brandName", "market")),
+        (_rtm_df, ("category", "brand", "territory")),
+    ])
+
+
+@st.cache_data(show_spinner=False)
+def content_generation_index(version, _gt_df, _rtm_df):
+    """brand -> category and brand -> territory options shared by GT and RTM."""
+    return {
+        "categories": cascade_index([
+            (_gt_df, ("brandName", "category")),
+            (_rtm_df, ("brand", "category")),
+        ]),
+        "territories": cascade_index([
+            (_gt_df, ("brandName", "market")),
+            (_rtm_df, ("brand", "territory")),
+        ]),
+    }
+
+
+# Joins the parent selections of a cascade option list into one JSON key
+CASCADE_SEP = "\x1f"
+
+
+def cascade_payload(index, dims, selection):
+    """A cascade_index for a map's filter bar: the option lists keyed by their
+    parents joined with CASCADE_SEP, the order of `dims`, and the current
+    `selection` ({dim: value or None})."""
+    return {
+        "dims": list(dims),
+        "options": {CASCADE_SEP.join(parents): values for parents, values in index.items()},
+        "selection": {dim: selection.get(dim) for dim in dims},
+    }
+
+
+def filter_index_version(versions, data):
+    """Version key of the tables behind the filter options of `data`."""
+    tables = (PWANI_TABLES[data],) if data == "MT" else (PWANI_TABLES[data], "rtm_data_cleaned")
+    return version_token(versions or {}, *tables)
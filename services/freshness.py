@@ -0,0 +1,98 @@
+import logging
+import threading
+import time
+
+import streamlit as st
+
+from config import load_freshness_interval
+from data_fetcher.query_builder import probe_tables
+from data_fetcher.snapshot_store import SNAPSHOT_TABLES, get_snapshot_store
+
+
+logger = logging.getLogger(__name__)
+
+
+class FreshnessMonitor:
+    """Probes the source tables on a schedule and reports which ones changed.
+
+    Loaders take the version token of their source tables as a cache key, so
+    a change to one table only misses the loaders that read it. Listeners
+    registered with `on_change` get `(old_versions, changed_tables)` after
+    the versions have been swapped.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = load_freshness_interval() if interval is None else interval
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._listeners = []
+        self._thread = None
+        self.checked_at = None
+        self.changed_at = None
+        self.last_error = None
+
+    def versions(self):
+        with self._lock:
+            return dict(self._versions)
+
+    def on_change(self, listener):
+        self._listeners.append(listener)
+
+    def probe(self):
+        """Probe every table once; returns the tables whose fingerprint changed."""
+        try:
+            probed = probe_tables(SNAPSHOT_TABLES)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning("Freshness probe failed: %s", e)
+            return []
+
+        with self._lock:
+            old = self._versions
+            changed = [t for t in probed if old and probed[t] != old.get(t)]
+            self._versions = probed
+            self.checked_at = time.time()
+            self.last_error = None
+            if changed:
+                self.changed_at = self.checked_at
+
+        if changed:
+            logger.info("Source tables changed: %s", ", ".join(changed))
+            store = get_snapshot_store()
+            for table in changed:
+                if store is not None:
+                    try:
+                        store.reconcile(table, probed[table]["rows"])
+                    except Exception as e:
+                        logger.warning("Snapshot refresh failed for %s: %s", table, e)
+            for listener in self._listeners:
+                listener(old, changed)
+        return changed
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="freshness-probe", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.probe()
+
+
+def version_token(versions, *tables):
+    """Hashable cache-key component for the current state of `tables`."""
+    return tuple(
+        (table, str(versions.get(table, {}).get("watermark")), versions.get(table, {}).get("rows"))
+        for table in tables
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_freshness_monitor():
+    """The process-wide monitor: probed once up front, then every FRESHNESS_PROBE_SECONDS."""
+    monitor = FreshnessMonitor()
+    monitor.probe()
+    monitor.start()
+    return monitor
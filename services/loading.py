@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+def load_concurrently(tasks: dict, label: str = "Loading data", quiet_seconds: float = 0.05):
+    """Run independent loaders in parallel and return {name: result}.
+
+    `tasks` maps a name to `(callable, args)`. Each worker thread is attached
+    to the current script run, so `st.cache_data` and warnings behave as they
+    do on the main thread. A combined progress bar is shown only if the loads
+    are not already served from cache within `quiet_seconds`.
+    """
+    if not tasks:
+        return {}
+
+    ctx = get_script_run_ctx()
+
+    def _attach_ctx():
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    with ThreadPoolExecutor(max_workers=len(tasks), initializer=_attach_ctx) as pool:
+        futures = {pool.submit(fn, *args): name for name, (fn, args) in tasks.items()}
+        done, pending = wait(futures, timeout=quiet_seconds)
+
+        if pending:
+            total = len(futures)
+            progress = st.progress(len(done) / total, text=label)
+            while pending:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                finished = total - len(pending)
+                progress.progress(finished / total, text=f"{label} ({finished}/{total})")
+            progress.empty()
+
+        return {name: future.result() for future, name in futures.items()}
@@ -0,0 +1,89 @@
+import streamlit as st
+
+from config import load_client_cube_rows
+from data_fetcher import get_geo_registry
+from data_fetcher.geo_crosswalk import remap
+from data_fetcher.geo_rollup import build_rollup
+from utils import filter_rows
+from utils.cube import encode_cube
+from utils.kpi import KpiCube
+from .datasets import COMPETITOR_TABLES, PWANI_TABLES
+from .freshness import version_token
+
+
+# cache_resource rather than cache_data: a rollup holds a few large frames and
+# every map slices it on every rerun, so sessions share the one object instead
+# of unpickling a copy per call. The frame is excluded from hashing; the source
+# table and its data version identify it.
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def geo_rollup(table, view, version, _df):
+    """GeoRollup of `table` as loaded for `view`, built once per data version."""
+    return build_rollup(table, _df)
+
+
+def rollup_version(versions, table):
+    return version_token(versions or {}, table)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def kpi_cube(data, version, has_audience, _brand_df, _comp_df, _audience_df=None):
+    """KpiCube of the Market Discovery frames of `data`, built once per data version."""
+    return KpiCube(_brand_df, _comp_df, data, _audience_df)
+
+
+@st.cache_data(show_spinner=False)
+def distributor_ranking(version, category, brand, territory, _rtm_df, n=5):
+    """The `n` distributors with the most sales under the filters (None = all),
+    with their customer count. Reads the shared frame through a row selection."""
+    rows = filter_rows(_rtm_df, {"category": category, "brand": brand, "territory": territory})
+    frame = _rtm_df[["distributorName", "territory", "valueSold", "customerName"]]
+    if rows is not None:
+        frame = frame.take(rows)
+    distributors = frame.groupby(["distributorName", "territory"], observed=True).agg({
+        "valueSold": "sum",
+        "customerName": "nunique",
+    }).reset_index()
+    return distributors.dropna().nlargest(n, "valueSold")
+
+
+@st.cache_data(show_spinner=False)
+def rtm_by_territory(version, category, brand, territory, _rtm_rollup):
+    """RTM metrics under the filters (None = all) re-cut from sub-counties onto
+    the territory polygons through the crosswalk: volumes split by area share,
+    AWS area-weighted. Keyed by normalized territory name."""
+    subcounties = _rtm_rollup.slice("subcounty", category=category, brand=brand, territory=territory)
+    return remap(subcounties, "subcounty", "subcounty", "territory", sums=("qtyKgRtm", "valueSold"), means=("aws",))
+
+
+@st.cache_data(show_spinner=False)
+def unmatched_locations(table, level, boundaries, version, _rollup):
+    """Units of `level` in the rollup of `table` that match no polygon of
+    `boundaries`, with the number of source rows each one leaves off the map."""
+    base = _rollup.base
+    column = _rollup.levels[level]
+    return get_geo_registry().unmatched(boundaries, base[column], rows=base["rows"])
+
+
+def kpi_version(versions, data):
+    """Version key of the tables behind the KPI cube of `data`."""
+    return version_token(versions or {}, PWANI_TABLES[data], COMPETITOR_TABLES[data], "target_audience_territory")
+
+
+def fits_client_cube(rollup):
+    """Whether `rollup` is small enough to ship to the browser as a cube."""
+    return len(rollup.base) <= load_client_cube_rows()
+
+
+# Cubes go to the browser inside the map component's arguments, not as files
+# under static/: that directory is served to anyone, logged in or not.
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def map_cube(name, version, level, metrics, _rollup, _locate=None):
+    """Cube payload of `metrics` per unit of `level` and every filter dimension,
+    for filtering in the browser with cube.js; built once per data version.
+    `id` names the build, so the browser decodes it once."""
+    components = _rollup.metric_components()
+    cube = encode_cube(_rollup.components(level), _rollup.dims, {m: components[m] for m in metrics}, _locate)
+    cube["id"] = f"{name}.{version}"
+    return cube
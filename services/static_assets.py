@@ -0,0 +1,90 @@
+import glob
+import hashlib
+import os
+import threading
+
+import streamlit as st
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from data_fetcher.demographics import load_demographic_index
+from data_fetcher.geojson_fetcher import level_for_zoom
+from utils.cube import CUBE_JS
+from utils.topojson import TOPOJSON_JS, dumps
+from .datasets import load_topology
+
+
+# Served by Streamlit at app/static/ ([server] enableStaticServing in
+# .streamlit/config.toml). The URL is relative so it resolves against the
+# page, and therefore also from inside components.html iframes.
+STATIC_DIR = "static"
+STATIC_URL = "app/static"
+
+
+class StaticAssets:
+    """Content-addressed files under static/ for the map iframes.
+
+    Everything here is public (static serving has no login), so only code and
+    non-sensitive reference data belong in it: plotly.js, boundaries, the
+    demographic index.
+
+    Every file name carries a hash of its content, so a URL never changes
+    meaning: browsers and proxies can keep it for as long as they like, and
+    a new plotly.js or boundary build simply gets a new URL. Older builds of
+    the same asset are removed when a new one is published.
+    """
+
+    def __init__(self, root=STATIC_DIR, url=STATIC_URL):
+        self.root = root
+        self.url = url
+        self._urls = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def publish(self, name, content, suffix):
+        """Write `content` as `<name>.<hash><suffix>` once and return its URL."""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        filename = f"{name}.{hashlib.sha256(data).hexdigest()[:12]}{suffix}"
+        path = os.path.join(self.root, filename)
+        with self._lock:
+            if not os.path.exists(path):
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                for stale in glob.glob(os.path.join(self.root, f"{glob.escape(name)}.*{suffix}")):
+                    if stale != path:
+                        os.remove(stale)
+        return f"{self.url}/{filename}"
+
+    def cached(self, key, build):
+        url = self._urls.get(key)
+        if url is None:
+            url = self._urls[key] = build()
+        return url
+
+    def plotly_js(self):
+        """plotly.js bundled with the installed plotly package, so it always matches the figures."""
+        return self.cached("plotly", lambda: self.publish(f"plotly-{get_plotlyjs_version()}", get_plotlyjs(), ".min.js"))
+
+    def topojson_js(self):
+        return self.cached("topojson", lambda: self.publish("topojson", TOPOJSON_JS, ".js"))
+
+    def cube_js(self):
+        return self.cached("cube", lambda: self.publish("cube", CUBE_JS, ".js"))
+
+    def topology(self, name, zoom=None):
+        level = level_for_zoom(zoom) if zoom is not None else None
+        return self.cached(
+            ("topology", name, level),
+            lambda: self.publish(f"{name}.{level or 'full'}", dumps(load_topology(name, level=level)), ".topo.json"),
+        )
+
+    def demographics(self):
+        """Every demographic metric as a map layer of compact float32 arrays, fetched once per browser."""
+        return self.cached("demographics", lambda: self.publish("demographics", dumps(load_demographic_index().layers()), ".json"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_static_assets():
+    """The process-wide asset publisher."""
+    return StaticAssets()
@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from config import load_warmup_workers
+from data_fetcher import get_geo_registry
+from .datasets import load_topology, page_tasks
+from .freshness import get_freshness_monitor
+
+
+logger = logging.getLogger(__name__)
+
+
+WARMUP_VIEWS = ("summary", "detail", "content_generation")
+WARMUP_DATA = ("MT", "GT")
+
+
+def warmup_tasks(versions=None):
+    """Every loader call the pages make, deduplicated, plus the encoded boundary files."""
+    tasks = {}
+    for data in WARMUP_DATA:
+        for view in WARMUP_VIEWS:
+            for fn, args in page_tasks(view, data, versions).values():
+                tasks.setdefault((fn.__name__, args), (fn, args))
+    for name, level in get_geo_registry().resolutions():
+        tasks[("load_topology", (name, None, level))] = (load_topology, (name, None, level))
+    return tasks
+
+
+def task_label(fn, args):
+    """Readable task name; version tokens are left out."""
+    return f"{fn.__name__}({', '.join(str(a) for a in args if not isinstance(a, tuple))})"
+
+
+class CacheWarmer:
+    """Runs the page loaders once in a background thread so the first session hits warm caches.
+
+    The loaders are the same cached functions the pages call, so a
+    finished warm-up is simply a set of populated cache entries. `start()` is
+    idempotent: a call during a run schedules one more pass, which
+    `invalidate()` relies on after the data changes.
+    """
+
+    def __init__(self, versions=dict, workers=None):
+        self.versions = versions
+        self.workers = load_warmup_workers() if workers is None else workers
+        self._lock = threading.Lock()
+        self._thread = None
+        self._rerun = None
+        self.runs = 0
+        self.reason = None
+        self.started_at = None
+        self.finished_at = None
+        self.done = 0
+        self.total = 0
+        self.failed = {}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, reason="startup"):
+        with self._lock:
+            if self.workers <= 0:
+                return False
+            if self.running:
+                self._rerun = reason
+                return False
+            self._thread = threading.Thread(
+                target=self._run, args=(reason,), name="cache-warmup", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def _run(self, reason):
+        while reason is not None:
+            self._warm(reason)
+            with self._lock:
+                reason, self._rerun = self._rerun, None
+
+    def _warm(self, reason):
+        tasks = warmup_tasks(self.versions())
+        with self._lock:
+            self.runs += 1
+            self.reason = reason
+            self.started_at = time.time()
+            self.finished_at = None
+            self.done = 0
+            self.total = len(tasks)
+            self.failed = {}
+
+        def load(fn, args):
+            try:
+                fn(*args)
+            except Exception as e:
+                name = task_label(fn, args)
+                logger.warning("Cache warm-up of %s failed: %s", name, e)
+                with self._lock:
+                    self.failed[name] = str(e)
+            with self._lock:
+                self.done += 1
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for fn, args in tasks.values():
+                pool.submit(load, fn, args)
+
+        with self._lock:
+            self.finished_at = time.time()
+        logger.info(
+            "Cache warm-up (%s) finished in %.1fs, %d/%d failed",
+            reason, self.finished_at - self.started_at, len(self.failed), self.total,
+        )
+
+    def invalidate(self, old_versions, changed):
+        """Drop the cache entries keyed on superseded versions, then re-warm.
+
+        Entries whose source tables did not change keep their key and stay cached.
+        """
+        current = warmup_tasks(self.versions())
+        for key, (fn, args) in warmup_tasks(old_versions).items():
+            if key not in current:
+                fn.clear(*args)
+        self.start(reason=f"data refresh ({', '.join(changed)})")
+
+    def status(self):
+        with self._lock:
+            if self.workers <= 0:
+                state = "disabled"
+            elif self.started_at is None:
+                state = "pending"
+            elif self.finished_at is None:
+                state = "warming"
+            elif self.failed:
+                state = "partial"
+            else:
+                state = "ready"
+            return {
+                "state": state,
+                "reason": self.reason,
+                "done": self.done,
+                "total": self.total,
+                "failed": dict(self.failed),
+                "seconds": round((self.finished_at or time.time()) - self.started_at, 1)
+                if self.started_at else None,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache_warmer():
+    """The process-wide warmer, started the first time any script run asks for it
+    and re-run whenever the freshness monitor sees a source table change."""
+    monitor = get_freshness_monitor()
+    warmer = CacheWarmer(versions=monitor.versions)
+    monitor.on_change(warmer.invalidate)
+    warmer.start()
+    return warmer
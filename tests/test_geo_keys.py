@@ -0,0 +1,59 @@
+import math
+
+import pandas as pd
+import pytest
+
+from data_fetcher import geo_crosswalk
+from data_fetcher.geo_crosswalk import remap
+from data_fetcher.geojson_fetcher import GeoRegistry
+from utils import to_key, to_keys
+
+
+def test_to_keys_normalizes_spellings():
+    names = pd.Series(["Murang'a", "MURANGA", "Elgeyo-Marakwet", "Keiyo Marakwet", "  nairobi ", None, "Tharaka–Nithi"],
+                      index=[10, 11, 12, 13, 14, 15, 16])
+    keys = to_keys(names)
+    assert keys.tolist() == ["MURANGA", "MURANGA", "ELGEYO MARAKWET", "ELGEYO MARAKWET", "NAIROBI", "", "THARAKA NITHI"]
+    assert keys.index.equals(names.index)
+    assert keys.tolist() == [to_key(n) for n in names]
+
+
+def test_unmatched_reports_names_with_no_polygon():
+    values = pd.Series(["Nairobi", "Atlantis", "atlantis!", "Mombasa"], index=[5, 6, 7, 8])
+    report = GeoRegistry().unmatched("counties", values, rows=pd.Series([3, 4, 5, 6], index=values.index))
+    assert report.to_dict("records") == [
+        {"value": "atlantis!", "key": "ATLANTIS", "rows": 5},
+        {"value": "Atlantis", "key": "ATLANTIS", "rows": 4},
+    ]
+
+
+# Westlands lies in Nairobi; a quarter of Kikuyu's area lies in Nairobi, the rest in Kiambu
+CROSSWALK = pd.DataFrame({
+    "subcounty": ["WESTLANDS", "KIKUYU", "KIKUYU"],
+    "county": ["NAIROBI", "NAIROBI", "KIAMBU"],
+    "territory": ["NAIROBI", "NAIROBI", "CENTRAL"],
+    "area_km2": [10.0, 10.0, 30.0],
+})
+
+
+@pytest.fixture(autouse=True)
+def crosswalk(monkeypatch):
+    monkeypatch.setattr(geo_crosswalk, "load_crosswalk", lambda: CROSSWALK)
+
+
+def test_remap_splits_sums_and_weights_means_by_area():
+    rtm = pd.DataFrame({"sub": ["Westlands", "kikuyu", "Atlantis"], "qty": [100.0, 40.0, 7.0], "aws": [50.0, 20.0, 1.0]})
+    out = remap(rtm, "sub", "subcounty", "county", sums=("qty",), means=("aws",)).set_index("county")
+    assert out.loc["NAIROBI", "qty"] == pytest.approx(100 + 40 * 0.25)
+    assert out.loc["KIAMBU", "qty"] == pytest.approx(40 * 0.75)
+    assert out.loc["NAIROBI", "aws"] == pytest.approx((50 * 10 + 20 * 10) / 20)
+    assert out.loc["KIAMBU", "aws"] == pytest.approx(20)
+    # Atlantis matches no sub-county and is dropped
+    assert out["qty"].sum() == pytest.approx(140)
+
+
+def test_remap_means_skip_missing_values():
+    rtm = pd.DataFrame({"subcounty": ["Westlands", "Kikuyu"], "aws": [50.0, None]})
+    out = remap(rtm, "subcounty", "subcounty", "territory", means=("aws",)).set_index("territory")
+    assert out.loc["NAIROBI", "aws"] == pytest.approx(50)
+    assert math.isnan(out.loc["CENTRAL", "aws"])
@@ -0,0 +1,198 @@
+import math
+
+import pandas as pd
+import pytest
+
+from utils.kpi import KpiCube, kpis
+
+
+# Small fixed frames in the shape of the detail page datasets. `baseline()` is
+# the inline arithmetic the page used before utils.kpi; both entry points of
+# the engine must give its numbers, except for the changes listed at the top
+# of utils/kpi.py, which the tests at the end pin with their old and new values.
+
+MT_BRAND = pd.DataFrame({
+    "category": ["Cooking Oil", "Cooking Oil", "Cooking Oil", "Soap", "Soap"],
+    "brandName": ["Fresh Fri", "Fresh Fri", "Salit", "Ushindi", "Ushindi"],
+    "territory": ["Nairobi", "Mombasa", "Nairobi", "Nairobi", "Kisumu"],
+    "market": ["Nairobi", "Mombasa", "Nairobi", "Nairobi", "Kisumu"],
+    "whiteSpaceScore": [40.0, 60.0, 25.0, 70.0, None],
+    "quantity": [100.0, 50.0, 30.0, 80.0, 20.0],
+    "ped": [-1.2, -0.8, -1.5, -0.4, -0.6],
+    "brandZVol": [0.5, -0.3, 1.1, 0.2, -0.9],
+    "cluster": ["Premium|High", "Value|Low", None, "Mass|Mid", "Mass|Mid"],
+})
+
+MT_COMPETITOR = pd.DataFrame({
+    "category": ["Cooking Oil"] * 5 + ["Soap"] * 2,
+    "territory": ["Nairobi", "Nairobi", "Mombasa", "Nairobi", "Nairobi", "Nairobi", "Kisumu"],
+    "brandName": ["Rina", "Golden Fry", "Rina", "Elianto", "Kimbo", "Menengai", "Menengai"],
+    "quantity": [70.0, 40.0, 25.0, 15.0, 5.0, 60.0, 10.0],
+    "totalQuantity": [70.0, 40.0, 25.0, 15.0, 5.0, 60.0, 10.0],
+})
+
+# GT rows repeat a brand's market volume on every row (one row per outlet type here)
+GT_BRAND = pd.DataFrame({
+    "category": ["Cooking Oil"] * 4 + ["Soap"] * 2,
+    "brandName": ["Fresh Fri", "Fresh Fri", "Fresh Fri", "Salit", "Ushindi", "Ushindi"],
+    "territory": ["Nairobi", "Nairobi", "Mombasa", "Nairobi", "Nairobi", "Nairobi"],
+    "market": ["Nairobi", "Nairobi", "Mombasa", "Nairobi", "Nairobi", "Nairobi"],
+    "whiteSpaceScore": [40.0, 42.0, 60.0, 25.0, 70.0, 72.0],
+    "brandTotalVolume": [500.0, 500.0, 120.0, 90.0, 300.0, 300.0],
+    "ped": [-1.2, -1.1, -0.8, -1.5, -0.4, -0.5],
+    "brandZVol": [0.5, 0.4, -0.3, 1.1, 0.2, 0.1],
+    "cluster": ["Premium|High", "Premium|High", "Value|Low", "Value|Low", "Mass|Mid", "Mass|Mid"],
+})
+
+GT_COMPETITOR = pd.DataFrame({
+    "category": ["Cooking Oil"] * 5 + ["Soap"] * 2,
+    "territory": ["Nairobi", "Nairobi", "Nairobi", "Mombasa", "Nairobi", "Nairobi", "Nairobi"],
+    "market": ["Nairobi", "Nairobi", "Nairobi", "Mombasa", "Nairobi", "Nairobi", "Nairobi"],
+    "brandName": ["Rina", "Rina", "Golden Fry", "Rina", "Kimbo", "Menengai", "Menengai"],
+    "brandTotalVolume": [400.0, 400.0, 250.0, 80.0, 60.0, 200.0, 200.0],
+})
+
+AUDIENCE = pd.DataFrame({
+    "market": ["Nairobi", "Nairobi", "Mombasa", "Nairobi", "Kisumu"],
+    "category": ["Cooking Oil", "Cooking Oil", "Cooking Oil", "Soap", "Soap"],
+    "brandName": ["Fresh Fri", "Salit", "Fresh Fri", "Ushindi", "Ushindi"],
+    "provincePopulation": [4_400_000.0, 4_300_000.0, 1_200_000.0, 4_400_000.0, 1_100_000.0],
+    "percentOfProvince": [12.0, 8.0, 10.0, 20.0, 15.0],
+})
+
+FRAMES = {"MT": (MT_BRAND, MT_COMPETITOR), "GT": (GT_BRAND, GT_COMPETITOR)}
+
+FILTERS = [
+    {},
+    {"category": "Cooking Oil"},
+    {"territory": "Nairobi"},
+    {"category": "Cooking Oil", "territory": "Nairobi"},
+    {"category": "Cooking Oil", "brandName": "Fresh Fri"},
+    {"category": "Cooking Oil", "brandName": "Fresh Fri", "territory": "Nairobi"},
+    {"category": "Soap", "brandName": "Ushindi", "territory": "Nairobi"},
+]
+
+KPIS = ("whiteSpaceScore", "marketShare", "concentration", "ped", "zScore", "cluster", "targetAudience")
+
+
+def baseline(data, brand_df, comp_df, audience_df, category=None, brandName=None, territory=None):
+    """The detail page KPIs as the page computed them inline."""
+    brand, competitor, audience = brand_df, comp_df, audience_df
+    if category:
+        brand = brand[brand["category"] == category]
+        competitor = competitor[competitor["category"] == category]
+        audience = audience[audience["category"] == category]
+    if territory:
+        brand = brand[brand["territory"] == territory]
+        competitor = competitor[competitor["territory"] == territory]
+        audience = audience[audience["market"] == territory]
+    if brandName:
+        brand = brand[brand["brandName"] == brandName]
+        audience = audience[audience["brandName"] == brandName]
+
+    if data == "MT":
+        grouped = competitor.groupby("brandName")["totalQuantity"].sum()
+        pwani, rivals = brand["quantity"].sum(), competitor["quantity"].sum()
+    else:
+        grouped = competitor.groupby("brandName")["brandTotalVolume"].sum()
+        pwani, rivals = sum(brand["brandTotalVolume"].unique()), sum(competitor["brandTotalVolume"].unique())
+    cluster = brand["cluster"].iloc[0] if len(brand) else None
+    population = audience.groupby("market")["provincePopulation"].mean().sum()
+    return {
+        "whiteSpaceScore": brand["whiteSpaceScore"].mean(),
+        "marketShare": pwani / (pwani + rivals) * 100,
+        "concentration": grouped.sort_values(ascending=False).head(3).sum() / grouped.sum() * 100,
+        "ped": brand["ped"].mean(),
+        "zScore": brand["brandZVol"].mean(),
+        "cluster": cluster.split("|")[0] if isinstance(cluster, str) else None,
+        "targetAudience": population * audience["percentOfProvince"].mean() / 100,
+    }
+
+
+def assert_same(actual, expected, skip=()):
+    for name in KPIS:
+        if name in skip:
+            continue
+        a, e = actual[name], expected[name]
+        if isinstance(e, str) or e is None:
+            assert a == e, name
+        elif math.isnan(e):
+            assert math.isnan(a), name
+        else:
+            assert a == pytest.approx(e), name
+
+
+# KPIs the engine defines differently from the page, per data (see utils/kpi.py)
+CHANGED = {"MT": (), "GT": ("concentration",)}
+
+
+@pytest.mark.parametrize("data", FRAMES)
+@pytest.mark.parametrize("filters", FILTERS, ids=lambda f: ",".join(f.values()) or "all")
+def test_kpis_match_baseline(data, filters):
+    brand, competitor = FRAMES[data]
+    assert_same(kpis(brand, competitor, data, AUDIENCE, **filters),
+                baseline(data, brand, competitor, AUDIENCE, **filters),
+                skip=CHANGED[data])
+
+
+@pytest.mark.parametrize("data", FRAMES)
+@pytest.mark.parametrize("filters", FILTERS, ids=lambda f: ",".join(f.values()) or "all")
+def test_cube_matches_kpis(data, filters):
+    brand, competitor = FRAMES[data]
+    cube = KpiCube(brand, competitor, data, AUDIENCE)
+    expected = kpis(brand, competitor, data, AUDIENCE, **filters)
+    actual = cube.get(**filters)
+    assert_same(actual, expected)
+    assert actual["rows"] == expected["rows"]
+
+
+def test_gt_market_share_counts_repeated_volume_once():
+    # Unchanged from the page while no two brands share a volume. Fresh Fri in Nairobi: 500 on two rows counts once; rivals: Rina 400 twice, Golden Fry 250, Kimbo 60
+    filters = {"category": "Cooking Oil", "brandName": "Fresh Fri", "territory": "Nairobi"}
+    expected = 500 / (500 + 400 + 250 + 60) * 100
+    assert kpis(GT_BRAND, GT_COMPETITOR, "GT", **filters)["marketShare"] == pytest.approx(expected)
+    assert KpiCube(GT_BRAND, GT_COMPETITOR, "GT").get(**filters)["marketShare"] == pytest.approx(expected)
+
+
+def test_empty_filter_is_the_whole_table():
+    cube = KpiCube(MT_BRAND, MT_COMPETITOR, "MT", AUDIENCE)
+    everything = kpis(MT_BRAND, MT_COMPETITOR, "MT", AUDIENCE)
+    assert everything["rows"] == len(MT_BRAND)
+    assert everything["marketShare"] == pytest.approx(280 / (280 + 225) * 100)
+    for none in ({}, {"category": None, "brandName": None, "territory": None}):
+        assert_same(cube.get(**none), everything)
+
+
+def test_no_matching_rows():
+    filters = {"category": "Soap", "brandName": "Fresh Fri"}
+    assert KpiCube(MT_BRAND, MT_COMPETITOR, "MT").get(**filters) is None
+    empty = kpis(MT_BRAND, MT_COMPETITOR, "MT", **filters)
+    assert empty["rows"] == 0
+    assert math.isnan(empty["whiteSpaceScore"])
+    assert empty["cluster"] is None
+
+
+def test_gt_concentration_counts_repeated_volume_once():
+    # Competitor volumes: Rina 400 twice in Nairobi and 80 in Mombasa, Golden Fry 250,
+    # Kimbo 60, Menengai 200 twice. The page summed every repeat.
+    old = baseline("GT", GT_BRAND, GT_COMPETITOR, AUDIENCE)["concentration"]
+    assert old == pytest.approx((880 + 400 + 250) / (880 + 250 + 60 + 400) * 100)
+    new = (480 + 250 + 200) / (480 + 250 + 60 + 200) * 100
+    assert kpis(GT_BRAND, GT_COMPETITOR, "GT")["concentration"] == pytest.approx(new)
+    assert KpiCube(GT_BRAND, GT_COMPETITOR, "GT").get()["concentration"] == pytest.approx(new)
+
+
+def test_gt_market_share_keeps_equal_volumes_of_different_brands():
+    brand = GT_BRAND.assign(brandTotalVolume=[300.0, 300.0, 120.0, 90.0, 300.0, 300.0])
+    # The page merged Fresh Fri's and Ushindi's 300 in Nairobi into one volume
+    old = baseline("GT", brand, GT_COMPETITOR, AUDIENCE, territory="Nairobi")["marketShare"]
+    assert old == pytest.approx((300 + 90) / (300 + 90 + 400 + 250 + 60 + 200) * 100)
+    new = (300 + 90 + 300) / (300 + 90 + 300 + 400 + 250 + 60 + 200) * 100
+    assert kpis(brand, GT_COMPETITOR, "GT", territory="Nairobi")["marketShare"] == pytest.approx(new)
+
+
+def test_cluster_is_the_first_one_present():
+    # The page took the first row's cluster and failed when it had none
+    brand = MT_BRAND.assign(cluster=[None, "Value|Low", None, "Mass|Mid", "Mass|Mid"])
+    assert baseline("MT", brand, MT_COMPETITOR, AUDIENCE, brandName="Fresh Fri")["cluster"] is None
+    assert kpis(brand, MT_COMPETITOR, "MT", brandName="Fresh Fri")["cluster"] == "Value"
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pandas as pd
+
+from data_fetcher.query_builder import DateWindow, build_select
+
+
+def test_calendar_windows_are_half_open():
+    assert DateWindow.year(2025) == DateWindow("2025-01-01", "2026-01-01")
+    assert DateWindow.month(2025, 12) == DateWindow("2025-12-01", "2026-01-01")
+    assert DateWindow.day("2026-02-28 17:45") == DateWindow("2026-02-28", "2026-03-01")
+
+
+def test_last_months_ends_with_the_anchor_month():
+    assert DateWindow.last_months(3, anchor="2026-02-15") == DateWindow("2025-12-01", "2026-03-01")
+    assert DateWindow.last_months(1, anchor="2026-01-01") == DateWindow.month(2026, 1)
+
+
+def test_windows_compare_by_range():
+    assert len({DateWindow.month(2026, 1), DateWindow("2026-01-01", "2026-02-01")}) == 1
+    assert DateWindow.month(2026, 1) != DateWindow.month(2026, 2)
+
+
+def test_window_predicate_is_sargable_and_parameterized():
+    window = DateWindow.month(2026, 1)
+    assert window.sql() == "date >= :start AND date < :end"
+    assert window.sql("c.date", name="c_") == "c.date >= :c_start AND c.date < :c_end"
+    assert window.params(name="c_") == {"c_start": datetime(2026, 1, 1), "c_end": datetime(2026, 2, 1)}
+    assert window.parquet_filters() == [("date", ">=", pd.Timestamp("2026-01-01")), ("date", "<", pd.Timestamp("2026-02-01"))]
+
+
+def test_build_select():
+    assert build_select("gt_data_pwani") == ("SELECT * FROM pwani_marketing.gt_data_pwani", {})
+
+    sql, params = build_select(
+        "mt_pwani_data_cleaned", columns=["brandName", "date"],
+        window=DateWindow.year(2026), where=["brandName IS NOT NULL"],
+    )
+    assert sql == (
+        "SELECT `brandName`, `date` FROM pwani_marketing.mt_pwani_data_cleaned"
+        " WHERE date >= :start AND date < :end AND brandName IS NOT NULL"
+    )
+    assert params == {"start": datetime(2026, 1, 1), "end": datetime(2027, 1, 1)}
@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+import config
+from data_fetcher.query_builder import SCHEMA
+from data_fetcher.snapshot_store import SnapshotStore
+
+
+# The store runs against a SQLite file attached as the pwani_marketing schema,
+# standing in for MySQL behind the shared engine.
+
+TABLE = "rtm_data_cleaned"
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    main, schema = tmp_path / "main.db", tmp_path / "schema.db"
+
+    def load_engine():
+        engine = sa.create_engine(f"sqlite:///{main}", poolclass=sa.pool.QueuePool)
+
+        @sa.event.listens_for(engine, "connect")
+        def _attach(dbapi_conn, record):
+            dbapi_conn.execute(f"ATTACH '{schema}' AS {SCHEMA}")
+
+        return engine
+
+    monkeypatch.setattr(config, "load_engine", load_engine)
+    monkeypatch.setattr(config, "_engine", None)
+    yield config.get_engine()
+    config.get_engine().dispose()
+
+
+def insert(engine, dates, first=0):
+    rows = pd.DataFrame({
+        "date": pd.to_datetime(pd.Series(dates)),
+        "brand": "Tiku",
+        "qtyKgRtm": [float(first + i) for i in range(len(dates))],
+    })
+    with engine.begin() as conn:
+        rows.to_sql(TABLE, conn, schema=SCHEMA, if_exists="append", index=False)
+
+
+def execute(engine, sql):
+    with engine.begin() as conn:
+        conn.execute(sa.text(sql))
+
+
+def test_incremental_refresh_keeps_undated_rows(source, tmp_path):
+    insert(source, ["2026-01-05", "2026-01-20", "2026-02-01", "2026-02-01", None, None])
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+
+    assert store.refresh(TABLE) == 6
+    # Only the last period and the undated rows are pulled again, and replace their old copies
+    assert store.refresh(TABLE) == 4
+    snapshot = store.read(TABLE)
+    assert len(snapshot) == 6
+    assert snapshot["date"].isna().sum() == 2
+    assert sorted(snapshot["qtyKgRtm"]) == [0, 1, 2, 3, 4, 5]
+
+
+def test_incremental_refresh_merges_new_rows_at_the_watermark(source, tmp_path):
+    insert(source, ["2026-01-05", "2026-02-01", None])
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    store.refresh(TABLE)
+    assert store.watermark(TABLE) == pd.Timestamp("2026-02-01")
+
+    insert(source, ["2026-02-01", "2026-03-01", None], first=3)
+    store.refresh(TABLE)
+
+    snapshot = store.read(TABLE)
+    assert sorted(snapshot["qtyKgRtm"]) == [0, 1, 2, 3, 4, 5]
+    assert (snapshot["date"] == pd.Timestamp("2026-02-01")).sum() == 2
+    entry = store.manifest()[TABLE]
+    assert entry["rows"] == 6
+    assert pd.Timestamp(entry["watermark"]) == pd.Timestamp("2026-03-01")
+
+
+def test_reconcile_repulls_rows_changed_behind_the_watermark(source, tmp_path):
+    insert(source, ["2026-01-05", "2026-01-20", "2026-02-01"])
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    store.refresh(TABLE)
+
+    execute(source, f"DELETE FROM {SCHEMA}.{TABLE} WHERE date < '2026-01-10'")
+    store.reconcile(TABLE, rows=2)
+
+    assert sorted(store.read(TABLE)["qtyKgRtm"]) == [1, 2]
+    assert store.manifest()[TABLE]["rows"] == 2
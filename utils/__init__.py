@@ -1 +1 @@
-from .tools import to_key,get_first_present,slugify,pick_index,base64_to_image,parse_json_payload
\ No newline at end of file
+from .tools import to_key,to_keys,filter_mask,filter_rows,get_first_present,slugify,pick_index,base64_to_image,parse_json_payload
\ No newline at end of file
@@ -0,0 +1,40 @@
+from html import escape
+from string import Formatter
+
+import numpy as np
+import pandas as pd
+
+
+def _column(frame, name, spec):
+    """One template field for every row: `spec`-formatted numbers, or escaped text."""
+    if name == "rank":
+        values = np.arange(1, len(frame) + 1)
+    else:
+        values = frame[name].to_numpy()
+    if spec:
+        return np.array([format(v, spec) for v in values], dtype=object)
+    return np.array([escape(str(v)) for v in values], dtype=object)
+
+
+def render_cards(template, frame):
+    """Every row of `frame` rendered through `template` and joined into one HTML block.
+
+    `template` uses str.format fields naming columns of `frame`, with an
+    optional format spec ("{valueSold:,.0f}"); `{rank}` is the 1-based
+    position. Each field is formatted once for the whole column and the
+    cards are assembled column-wise, not row by row.
+    """
+    cards = np.full(len(frame), "", dtype=object)
+    for literal, name, spec, _ in Formatter().parse(template):
+        cards = cards + literal
+        if name is not None:
+            cards = cards + _column(frame, name, spec)
+    return "".join(cards)
+
+
+def bar_width(values, scale=None):
+    """Progress-bar widths in percent: `values` relative to `scale` (their maximum by default), in [0, 100]."""
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    scale = np.nanmax(values) if scale is None and len(values) else scale
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.clip(np.nan_to_num(values / scale * 100), 0, 100)
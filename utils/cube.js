@@ -0,0 +1,62 @@
+// Decoder and filter engine for the cubes written by utils/cube.py.
+function decodeCube(payload) {
+  const buffer = b64 => Uint8Array.from(atob(b64), c => c.charCodeAt(0)).buffer;
+  const codes = {}, values = {};
+  payload.dims.forEach(d => codes[d] = new Uint16Array(buffer(payload.codes[d])));
+  Object.keys(payload.values).forEach(c => values[c] = new Float32Array(buffer(payload.values[c])));
+  return {...payload, codes, values};
+}
+
+// Row test for `filters` ({dim: label}, null or missing = every label); false when a label is unknown.
+function cubeMatcher(cube, filters, skip) {
+  const wanted = [];
+  for (const d of cube.dims) {
+    if (d === skip || filters[d] == null) continue;
+    const code = cube.labels[d].indexOf(filters[d]);
+    if (code < 0) return null;
+    wanted.push([cube.codes[d], code]);
+  }
+  return r => wanted.every(([codes, code]) => codes[r] === code);
+}
+
+// Metrics of the rows matching `filters`, one object per combination of the `by` dims.
+// Means are summed components divided by summed counts, as on the server; the components
+// ship as float32, so results agree with the server's to float32 precision.
+function cubeAggregate(cube, filters, by) {
+  const match = cubeMatcher(cube, filters);
+  if (!match) return [];
+  const columns = Object.keys(cube.values);
+  const groups = new Map();
+  for (let r = 0; r < cube.rows; r++) {
+    if (!match(r)) continue;
+    const key = by.map(d => cube.codes[d][r]).join("|");
+    let g = groups.get(key);
+    if (!g) groups.set(key, g = {codes: by.map(d => cube.codes[d][r]), sums: new Float64Array(columns.length)});
+    columns.forEach((c, j) => g.sums[j] += cube.values[c][r]);
+  }
+  const at = c => columns.indexOf(c);
+  return [...groups.values()].map(g => {
+    const row = {};
+    by.forEach((d, i) => row[d] = cube.labels[d][g.codes[i]]);
+    Object.entries(cube.metrics).forEach(([name, [total, count]]) => {
+      const n = count ? g.sums[at(count)] : 1;
+      row[name] = n > 0 ? g.sums[at(total)] / n : null;
+    });
+    return row;
+  });
+}
+
+// `metric` per map unit under `filters`, aligned with cube.labels.unit (null where no rows).
+function cubeVector(cube, filters, metric) {
+  const byUnit = new Map(cubeAggregate(cube, filters, ["unit"]).map(row => [row.unit, row[metric]]));
+  return cube.labels.unit.map(u => byUnit.has(u) ? byUnit.get(u) : null);
+}
+
+// Labels of `dim` that still have rows under the filters on the other dims.
+function cubeOptions(cube, dim, filters) {
+  const match = cubeMatcher(cube, filters, dim);
+  if (!match) return [];
+  const seen = new Set();
+  for (let r = 0; r < cube.rows; r++) if (match(r)) seen.add(cube.codes[dim][r]);
+  return [...seen].sort((a, b) => a - b).map(code => cube.labels[dim][code]);
+}
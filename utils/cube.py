@@ -0,0 +1,40 @@
+import base64
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def _b64(values, dtype):
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode("ascii")
+
+
+def encode_cube(frame, dims, metrics, locate=None):
+    """Encode additive metric components for filtering in the browser.
+
+    `frame` has one row per combination of `dims` and `unit`, plus the
+    component columns named in `metrics` (name -> (sum column, count column
+    or None)). Labels are dictionary-encoded as uint16 codes and components
+    travel as float32, all base64. `locate` maps the sorted unit labels to
+    the featureidkey values the map joins on. Decode with `decodeCube` from
+    cube.js.
+    """
+    dims = [*dims, "unit"]
+    cube = {"dims": dims, "rows": len(frame), "labels": {}, "codes": {}, "values": {}, "metrics": {}}
+    for dim in dims:
+        codes, labels = pd.factorize(frame[dim].fillna("").astype(str), sort=True)
+        if len(labels) > np.iinfo(np.uint16).max:
+            raise ValueError(f"Too many {dim} labels for a cube: {len(labels)}")
+        cube["labels"][dim] = list(labels)
+        cube["codes"][dim] = _b64(codes, "<u2")
+    columns = dict.fromkeys(col for pair in metrics.values() for col in pair if col)
+    for col in columns:
+        cube["values"][col] = _b64(frame[col].to_numpy(dtype=float), "<f4")
+    cube["metrics"] = {name: [total, count] for name, (total, count) in metrics.items()}
+    if locate is not None:
+        cube["locations"] = list(locate(cube["labels"]["unit"]))
+    return cube
+
+
+with open(os.path.join(os.path.dirname(__file__), "cube.js"), "r", encoding="utf-8") as f:
+    CUBE_JS = f.read()
@@ -0,0 +1,196 @@
+import numpy as np
+
+
+def douglas_peucker(points, tolerance):
+    """Indices kept by Douglas-Peucker on an open polyline (endpoints always kept)."""
+    pts = np.asarray(points, dtype=float)
+    n = len(pts)
+    if n < 3:
+        return list(range(n))
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        seg = pts[start + 1:end]
+        a, b = pts[start], pts[end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            dist = np.hypot(*(seg - a).T)
+        else:
+            dist = np.abs(ab[0] * (seg[:, 1] - a[1]) - ab[1] * (seg[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return np.flatnonzero(keep).tolist()
+
+
+def _rings(geometry):
+    """(polygon index, ring index, ring) for every ring of a Polygon/MultiPolygon."""
+    if geometry is None:
+        return []
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return []
+    return [(p, r, ring) for p, polygon in enumerate(polygons) for r, ring in enumerate(polygon)]
+
+
+def _open_ring(ring):
+    pts = [tuple(pt[:2]) for pt in ring]
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts = pts[:-1]
+    return pts
+
+
+def find_junctions(features):
+    """Vertices where the set of neighbouring vertices is not a single line.
+
+    A vertex on a border shared by two polygons has the same two neighbours
+    in both rings; where three polygons meet, or where a shared border turns
+    into a coastline, it gains a third neighbour. Splitting rings there
+    yields arcs that are shared whole or not at all.
+    """
+    neighbours = {}
+    for feat in features:
+        for _, _, ring in _rings(feat.get("geometry")):
+            pts = _open_ring(ring)
+            n = len(pts)
+            for i, pt in enumerate(pts):
+                seen = neighbours.setdefault(pt, set())
+                seen.add(pts[i - 1])
+                seen.add(pts[(i + 1) % n])
+    return {pt for pt, seen in neighbours.items() if len(seen) > 2}
+
+
+def _split_ring(pts, junctions):
+    """Cut a closed ring into arcs between junctions; a ring with none is one arc
+    anchored at its smallest vertex, so every ring sharing it picks the same anchor."""
+    cuts = [i for i, pt in enumerate(pts) if pt in junctions]
+    if not cuts:
+        cuts = [pts.index(min(pts))]
+    start = cuts[0]
+    rotated = pts[start:] + pts[:start]
+    offsets = [c - start for c in cuts] + [len(pts)]
+    closed = rotated + [rotated[0]]
+    return [closed[a:b + 1] for a, b in zip(offsets, offsets[1:])]
+
+
+def _extent(ring):
+    xs = [pt[0] for pt in ring]
+    ys = [pt[1] for pt in ring]
+    return max(max(xs) - min(xs), max(ys) - min(ys))
+
+
+def simplify_features(features, tolerance, decimals=None):
+    """Topology-preserving simplification of polygon features.
+
+    Rings are split into arcs at junctions and each distinct arc is
+    simplified once, so neighbouring polygons keep an identical shared
+    border and no gaps or overlaps open up. Holes and outlying parts smaller
+    than `tolerance` are dropped; other rings that would collapse below a
+    triangle keep their original vertices. Returns new feature dicts with
+    the same properties.
+    """
+    junctions = find_junctions(features)
+    simplified_arcs = {}
+
+    def simplify_arc(arc):
+        key = tuple(arc)
+        reverse = key[::-1]
+        canonical = min(key, reverse)
+        if canonical not in simplified_arcs:
+            kept = douglas_peucker(canonical, tolerance)
+            simplified_arcs[canonical] = [canonical[i] for i in kept]
+        out = simplified_arcs[canonical]
+        return out if canonical == key else out[::-1]
+
+    def round_pt(pt):
+        return [round(c, decimals) for c in pt] if decimals is not None else list(pt)
+
+    result = []
+    for feat in features:
+        geometry = feat.get("geometry")
+        rings = _rings(geometry)
+        if not rings:
+            result.append(feat)
+            continue
+        extents = {(p, r): _extent(ring) for p, r, ring in rings}
+        largest = max((p for p, r, _ in rings if r == 0), key=lambda p: extents[(p, 0)])
+        polygons = {}
+        for p, r, ring in rings:
+            # Holes and outlying parts smaller than the tolerance are invisible at this resolution
+            if extents[(p, r)] < tolerance and (r > 0 or p != largest):
+                continue
+            if r > 0 and p not in polygons:
+                continue
+            pts = _open_ring(ring)
+            out = []
+            for arc in _split_ring(pts, junctions):
+                out.extend(simplify_arc(arc)[:-1])
+            out.append(out[0])
+            if len(out) < 4:
+                out = pts + [pts[0]]
+            polygons.setdefault(p, []).append([round_pt(pt) for pt in out])
+        coords = [polygons[p] for p in sorted(polygons)]
+        geometry = (
+            {"type": "Polygon", "coordinates": coords[0]}
+            if geometry["type"] == "Polygon"
+            else {"type": "MultiPolygon", "coordinates": coords}
+        )
+        result.append({**feat, "geometry": geometry})
+    return result
+
+
+def vertex_count(features):
+    return sum(len(ring) for feat in features for _, _, ring in _rings(feat.get("geometry")))
+
+
+def bounds(geometry):
+    """(min x, min y, max x, max y) of a Polygon/MultiPolygon."""
+    pts = np.array([pt[:2] for _, _, ring in _rings(geometry) for pt in ring], dtype=float)
+    return (*pts.min(axis=0), *pts.max(axis=0))
+
+
+def contains(geometry, xs, ys, chunk=256):
+    """Vectorized even-odd point-in-polygon test of points `xs`, `ys` against
+    every ring of `geometry` (holes included)."""
+    xs = np.asarray(xs, dtype=float)[:, None]
+    ys = np.asarray(ys, dtype=float)[:, None]
+    inside = np.zeros(len(xs), dtype=bool)
+    for _, _, ring in _rings(geometry):
+        pts = np.asarray([pt[:2] for pt in ring], dtype=float)
+        a, b = pts[:-1], pts[1:]
+        for i in range(0, len(a), chunk):
+            x1, y1 = a[i:i + chunk, 0], a[i:i + chunk, 1]
+            x2, y2 = b[i:i + chunk, 0], b[i:i + chunk, 1]
+            crosses = (y1 > ys) != (y2 > ys)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_at = (x2 - x1) * (ys - y1) / (y2 - y1) + x1
+            inside ^= (np.count_nonzero(crosses & (xs < x_at), axis=1) % 2).astype(bool)
+    return inside
+
+
+def locate(features, key, xs, ys):
+    """Value of property `key` of the feature containing each point ("" where none does)."""
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    labels = np.full(len(xs), "", dtype=object)
+    for feat in features:
+        label = (feat.get("properties") or {}).get(key)
+        if not label or not _rings(feat.get("geometry")):
+            continue
+        x0, y0, x1, y1 = bounds(feat["geometry"])
+        candidates = np.flatnonzero((labels == "") & (xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1))
+        if len(candidates):
+            hit = contains(feat["geometry"], xs[candidates], ys[candidates])
+            labels[candidates[hit]] = label
+    return labels
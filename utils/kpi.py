@@ -0,0 +1,244 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .tools import filter_rows
+
+
+# Every KPI is computed from additive components (sums, counts, volumes per
+# competitor brand), so one filter combination and every combination at once
+# (`kpi_table`) go through the same code and give the same numbers.
+#
+# Where this differs from the inline page code it replaced, on purpose:
+# - A repeated GT volume counts once per brand and market, in market share and
+#   in the concentration index. The page summed the distinct volumes of the
+#   whole selection for market share, which also merged equal volumes of
+#   different brands, and summed every repeat for concentration.
+# - The cluster is the first one present; the page took the first row's and
+#   failed when that row had none or no row matched.
+
+DIMENSIONS = ("category", "brandName", "territory")
+ALL = "*"  # dimension value of KpiCube rows rolled up over every value of that dimension
+# A brand filter picks Pwani rows only; competitors are filtered by the others
+COMPETITOR_DIMENSIONS = ("category", "territory")
+# data -> (Pwani, competitor) volume columns behind market share
+SHARE_VOLUME = {"MT": ("quantity", "quantity"), "GT": ("brandTotalVolume", "brandTotalVolume")}
+# data -> competitor volume column behind the concentration index
+CONCENTRATION_VOLUME = {"MT": "totalQuantity", "GT": "brandTotalVolume"}
+# GT rows repeat a brand's volume in a market on every row; each one counts once
+REPEATED_VOLUME_KEYS = {"GT": ("brandName", "market")}
+TOP_COMPETITORS = 3
+# Target audience rows name the territory in their market column
+AUDIENCE_COLUMNS = {"territory": "market"}
+
+_MEANS = {"whiteSpaceScore": "whiteSpaceScore", "ped": "ped", "zScore": "brandZVol"}
+_BRAND_COMPONENTS = ["rows", *(f"{name}.{part}" for name in _MEANS for part in ("sum", "n")), "volume"]
+
+
+def ratio(total, count):
+    """total / count elementwise, NaN where count is 0."""
+    total = np.asarray(total, dtype=float)
+    count = np.asarray(count, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def market_share(pwani, competitor):
+    """Pwani share of total volume, in percent."""
+    pwani = np.asarray(pwani, dtype=float)
+    return ratio(pwani * 100, pwani + np.asarray(competitor, dtype=float))
+
+
+def concentration(volumes, top=TOP_COMPETITORS):
+    """Share of the `top` largest competitor brands in total competitor volume, in percent."""
+    volumes = np.sort(np.asarray(volumes, dtype=float))[::-1]
+    return float(ratio(volumes[:top].sum() * 100, volumes.sum()))
+
+
+def row_volume(df, column, data):
+    """Volume each row contributes; repeated GT volumes count once per brand and market."""
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    keys = REPEATED_VOLUME_KEYS.get(data)
+    if keys:
+        values = np.where(df.duplicated([*keys, column]).to_numpy(), 0.0, values)
+    return np.nan_to_num(values)
+
+
+def _sums(parts, by):
+    """Every column summed per combination of `by`; one row when `by` is empty."""
+    if by:
+        return parts.groupby(list(by), sort=False, dropna=False, observed=True).sum().reset_index()
+    return parts.sum().to_frame().T
+
+
+def brand_components(df, data, by=()):
+    """Pwani components per combination of `by`: sums and counts of the mean
+    KPIs, volume, and the position and cluster of the group's first row."""
+    parts = pd.DataFrame({d: df[d].to_numpy() for d in by}, index=pd.RangeIndex(len(df)))
+    parts["rows"] = 1
+    for name, column in _MEANS.items():
+        values = df[column].to_numpy(dtype=float, na_value=np.nan)
+        parts[f"{name}.sum"] = np.nan_to_num(values)
+        parts[f"{name}.n"] = ~np.isnan(values)
+    parts["volume"] = row_volume(df, SHARE_VOLUME[data][0], data)
+    parts["first"] = np.arange(len(df))
+    parts["cluster"] = df["cluster"].to_numpy() if "cluster" in df.columns else None
+    return brand_rollup(parts, by)
+
+
+def brand_rollup(parts, by=()):
+    """Brand components summed per combination of `by`. The cluster is not
+    additive: it is the one of the first row that has one, by position."""
+    out = _sums(parts[[*by, *_BRAND_COMPONENTS]], by)
+    labelled = parts[parts["cluster"].notna()].sort_values("first", kind="stable")
+    if by:
+        firsts = labelled.groupby(list(by), sort=False, dropna=False)[["first", "cluster"]].first()
+        return out.merge(firsts.reset_index(), on=list(by), how="left")
+    first = labelled[["first", "cluster"]].head(1).reset_index(drop=True).reindex([0]).iloc[0]
+    return out.assign(first=first["first"], cluster=first["cluster"])
+
+
+def competitor_components(df, data, by=()):
+    """Competitor volumes per competitor brand and combination of `by`."""
+    by = [d for d in by if d in COMPETITOR_DIMENSIONS]
+    concentration_column = CONCENTRATION_VOLUME[data]
+    parts = pd.DataFrame({d: df[d].to_numpy() for d in [*by, "brandName"]})
+    parts["competitorVolume"] = row_volume(df, SHARE_VOLUME[data][1], data)
+    parts["brandVolume"] = row_volume(df, concentration_column, data) if concentration_column in df.columns else np.nan
+    return _sums(parts, [*by, "brandName"])
+
+
+def competitor_totals(components, by=()):
+    """Competitor volume and top-brand concentration per combination of `by`."""
+    by = [d for d in by if d in COMPETITOR_DIMENSIONS]
+    keyed = components.assign(_all=0)
+    keys = by or ["_all"]
+    ranked = keyed.sort_values("brandVolume", ascending=False, kind="stable")
+    top = ranked.groupby(keys, sort=False, dropna=False).head(TOP_COMPETITORS)
+    grouped = keyed.groupby(keys, sort=False, dropna=False)
+    out = pd.DataFrame({
+        "competitorVolume": grouped["competitorVolume"].sum(),
+        "brandVolume": grouped["brandVolume"].sum(min_count=1),
+    })
+    out["topVolume"] = top.groupby(keys, sort=False, dropna=False)["brandVolume"].sum(min_count=1)
+    out["concentration"] = ratio(out["topVolume"] * 100, out["brandVolume"])
+    out = out.reset_index()
+    if not by and out.empty:
+        out = pd.DataFrame({"competitorVolume": [0.0], "concentration": [np.nan]})
+    return out[[*by, "competitorVolume", "concentration"]]
+
+
+def audience_components(df, by=()):
+    """Target audience components per territory and combination of `by`:
+    population sums and counts, and percent-of-province sums and counts."""
+    frame = df.rename(columns={v: k for k, v in AUDIENCE_COLUMNS.items()})
+    keys = list(dict.fromkeys([*by, "territory"]))
+    parts = pd.DataFrame({d: frame[d].to_numpy() for d in keys})
+    for name, column in (("population", "provincePopulation"), ("percent", "percentOfProvince")):
+        values = frame[column].to_numpy(dtype=float, na_value=np.nan)
+        parts[f"{name}.sum"] = np.nan_to_num(values)
+        parts[f"{name}.n"] = ~np.isnan(values)
+    return _sums(parts, keys)
+
+
+def audience_totals(components, by=()):
+    """Target audience per combination of `by`: the summed mean population of
+    its territories times the mean percent of province."""
+    parts = components.assign(population=ratio(components["population.sum"], components["population.n"]))
+    parts = parts[[*by, "population", "percent.sum", "percent.n"]]
+    out = _sums(parts, by)
+    out["targetAudience"] = out["population"] * ratio(out["percent.sum"], out["percent.n"]) / 100
+    return out[[*by, "targetAudience"]]
+
+
+def finish(brand, competitor, audience=None, by=()):
+    """KPI columns from brand, competitor and audience totals keyed by `by`."""
+    competitor_by = [d for d in by if d in COMPETITOR_DIMENSIONS]
+    out = brand.merge(competitor, on=competitor_by, how="left") if competitor_by \
+        else brand.assign(**competitor.iloc[0].to_dict())
+    if audience is not None:
+        out = out.merge(audience, on=list(by), how="left") if by \
+            else out.assign(targetAudience=audience["targetAudience"].iloc[0])
+    else:
+        out["targetAudience"] = np.nan
+    for name in _MEANS:
+        out[name] = ratio(out[f"{name}.sum"], out[f"{name}.n"])
+    out["marketShare"] = market_share(out["volume"], out["competitorVolume"].fillna(0))
+    out["cluster"] = out["cluster"].map(lambda c: c.split("|")[0] if isinstance(c, str) else None)
+    return out[[*by, "whiteSpaceScore", "marketShare", "concentration", "ped", "zScore", "cluster",
+                "targetAudience", "rows"]]
+
+
+def kpi_table(brand_df, comp_df, data, audience_df=None, by=DIMENSIONS):
+    """Every KPI for every combination of `by` present in the Pwani rows, in one pass.
+
+    Columns: `by`, whiteSpaceScore, marketShare, concentration (top-3
+    competitor share), ped, zScore, cluster, targetAudience, rows. Market
+    share and concentration compare against the competitors of the same
+    category and territory, whatever the brand.
+    """
+    by = list(by)
+    brand = brand_components(brand_df, data, by)
+    competitor = competitor_totals(competitor_components(comp_df, data, by), by)
+    audience = None
+    if audience_df is not None:
+        audience = audience_totals(audience_components(audience_df, by), by)
+    return finish(brand, competitor, audience, by)
+
+
+def kpis(brand_df, comp_df, data, audience_df=None, **filters):
+    """Every KPI for one filter combination ({dimension: value}, None = all), as a dict."""
+    brand = _take(brand_df, filter_rows(brand_df, filters))
+    competitor = _take(comp_df, filter_rows(comp_df, {d: filters.get(d) for d in COMPETITOR_DIMENSIONS}))
+    audience = None
+    if audience_df is not None:
+        audience = _take(audience_df, filter_rows(audience_df, filters, AUDIENCE_COLUMNS))
+    return kpi_table(brand, competitor, data, audience, by=()).iloc[0].to_dict()
+
+
+def _take(df, rows):
+    return df if rows is None else df.take(rows)
+
+
+class KpiCube:
+    """Every KPI for every combination of category, brand and territory values and ALL.
+
+    The components are grouped once at the finest grain and rolled up to
+    each level of the hierarchy, so `get()` is a dictionary lookup whatever
+    the size of the tables. Numbers are those of `kpis()` on the same frames.
+    """
+
+    def __init__(self, brand_df, comp_df, data, audience_df=None):
+        brand = brand_components(brand_df, data, DIMENSIONS)
+        competitor = competitor_components(comp_df, data, DIMENSIONS)
+        audience = audience_components(audience_df, DIMENSIONS) if audience_df is not None else None
+        pieces = []
+        for mask in itertools.product((True, False), repeat=len(DIMENSIONS)):
+            kept = [d for d, keep in zip(DIMENSIONS, mask) if keep]
+            kept_competitor = [d for d in kept if d in COMPETITOR_DIMENSIONS]
+            competitor_part = _sums(
+                competitor[[*kept_competitor, "brandName", "competitorVolume", "brandVolume"]],
+                [*kept_competitor, "brandName"],
+            )
+            audience_part = None
+            if audience is not None:
+                keys = list(dict.fromkeys([*kept, "territory"]))
+                audience_part = audience_totals(
+                    _sums(audience[[*keys, "population.sum", "population.n", "percent.sum", "percent.n"]], keys), kept)
+            part = finish(brand_rollup(brand, kept), competitor_totals(competitor_part, kept), audience_part, kept)
+            for d in DIMENSIONS:
+                if d not in kept:
+                    part[d] = ALL
+            pieces.append(part[[*DIMENSIONS, *part.columns.drop(list(DIMENSIONS))]])
+        self.frame = pd.concat(pieces, ignore_index=True)
+        self._rows = dict(zip(
+            self.frame[list(DIMENSIONS)].itertuples(index=False, name=None),
+            self.frame.drop(columns=list(DIMENSIONS)).to_dict("records"),
+        ))
+
+    def get(self, **filters):
+        """KPIs of one filter combination ({dimension: value}, None = all) as a
+        dict, or None when no Pwani row matches it."""
+        key = tuple(ALL if filters.get(d) is None else filters[d] for d in DIMENSIONS)
+        return self._rows.get(key)
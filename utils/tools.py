@@ -1,25 +1,73 @@
+import numpy as np
 import pandas as pd
 import re
 import unicodedata
 import base64
+from functools import lru_cache
 from io import BytesIO
 
+# Canonical key -> canonical key of the spelling the boundary files use.
+# Keys are compared after `_canonical`, so case, accents, apostrophes and
+# hyphen/space/slash variants never need an entry of their own.
 ALIASES = {
-    "ELGEYO": "ELGEYO-MARAKWET",
-    "MURANGA": "MURANG'A",
-    "TAITA TAVETA": "TAITA-TAVETA",
-    "THARAKA NITHI": "THARAKA-NITHI",
-    "HOMA BAY": "HOMA BAY",
-    "UASIN-GISHU": "UASIN GISHU",
-    "TRANS-NZOIA": "TRANS NZOIA",
-    "TANA RIVER": "TANA RIVER",
+    "ELGEYO": "ELGEYO MARAKWET",
+    "ELEGEYO MARAKWET": "ELGEYO MARAKWET",
+    "KEIYO MARAKWET": "ELGEYO MARAKWET",
     "NAIROBI CITY": "NAIROBI",
+    "THARAKA": "THARAKA NITHI",
+    "TAITA": "TAITA TAVETA",
+    "MOUNT ELGON": "MT ELGON",
+    "N EASTERN": "NORTH EASTERN",
+    "NORTHEASTERN": "NORTH EASTERN",
+    "RIFT": "RIFT VALLEY",
 }
 
+
+@lru_cache(maxsize=None)
+def _canonical(value: str) -> str:
+    # Accents are stripped; other non-ASCII marks (en dashes, curly apostrophes) are handled like their ASCII forms
+    u = "".join(c for c in unicodedata.normalize("NFKD", value) if not unicodedata.combining(c)).upper()
+    u = re.sub(r"['`\u2018\u2019\u02bc]", "", u)
+    u = re.sub(r"[^A-Z0-9]+", " ", u).strip()
+    return ALIASES.get(u, u)
+
+
 def to_key(x):
+    """Canonical location key of one name ("" for missing values)."""
     if pd.isna(x): return ""
-    u = str(x).strip().upper()
-    return ALIASES.get(u, u)
+    return _canonical(str(x))
+
+
+def to_keys(values) -> pd.Series:
+    """`to_key` over a whole column: each distinct value is normalized once."""
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    keys = np.array([_canonical(str(u)) for u in uniques] + [""], dtype=object)
+    return pd.Series(keys[codes], index=values.index, dtype=object)
+
+def filter_mask(df, filters, columns=None):
+    """Rows of `df` matching `filters` ({dimension: value}, None = any value).
+
+    `columns` renames dimensions to the frame's columns; dimensions the
+    frame lacks are ignored.
+    """
+    columns = columns or {}
+    mask = np.ones(len(df), dtype=bool)
+    for dim, value in filters.items():
+        column = columns.get(dim, dim)
+        if value is not None and column in df.columns:
+            mask &= (df[column] == value).to_numpy()
+    return mask
+
+
+def filter_rows(df, filters, columns=None):
+    """Positions of the rows of `df` matching `filters` (see `filter_mask`),
+    or None when no filter applies, so callers read the whole frame as is."""
+    columns = columns or {}
+    if all(value is None or columns.get(dim, dim) not in df.columns for dim, value in filters.items()):
+        return None
+    return np.flatnonzero(filter_mask(df, filters, columns))
+
 
 def get_first_present(d: dict, keys: list[str], default=None):
     for k in keys:
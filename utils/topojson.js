@@ -0,0 +1,28 @@
+// Decoder for the quantized TopoJSON written by utils/topojson.py.
+function topoFeatures(topology) {
+  const [sx, sy] = topology.transform ? topology.transform.scale : [1, 1];
+  const [tx, ty] = topology.transform ? topology.transform.translate : [0, 0];
+  const arcs = topology.arcs.map(arc => {
+    let x = 0, y = 0;
+    return arc.map(([dx, dy]) => [(x += dx) * sx + tx, (y += dy) * sy + ty]);
+  });
+  const ring = refs => {
+    const points = [];
+    refs.forEach(i => {
+      const arc = i < 0 ? arcs[~i].slice().reverse() : arcs[i];
+      if (points.length) points.pop();
+      arc.forEach(p => points.push(p));
+    });
+    return points;
+  };
+  const geometry = g => {
+    if (g.type === "Polygon") return {type: "Polygon", coordinates: g.arcs.map(ring)};
+    if (g.type === "MultiPolygon") return {type: "MultiPolygon", coordinates: g.arcs.map(p => p.map(ring))};
+    return null;
+  };
+  const object = topology.objects[Object.keys(topology.objects)[0]];
+  return {
+    type: "FeatureCollection",
+    features: object.geometries.map(g => ({type: "Feature", properties: g.properties || {}, geometry: geometry(g)})),
+  };
+}
@@ -0,0 +1,86 @@
+import json
+import os
+
+from .geometry import _open_ring, _rings, _split_ring, find_junctions
+
+
+OBJECT_NAME = "boundaries"
+
+
+def encode_topology(geojson, quantization=100_000, properties=None):
+    """Encode polygon GeoJSON as quantized TopoJSON.
+
+    Rings are cut into arcs at junctions and each shared border is stored
+    once; arcs are snapped to a `quantization` x `quantization` integer grid
+    over the bounding box and delta-encoded, so most coordinates become
+    small integers. `properties` limits the feature properties carried
+    along (default: all). Decode in the browser with `topoFeatures` from
+    topojson.js.
+    """
+    features = geojson.get("features", [])
+    coords = [pt for feat in features for _, _, ring in _rings(feat.get("geometry")) for pt in ring]
+    if not coords:
+        return {"type": "Topology", "arcs": [], "objects": {OBJECT_NAME: {"type": "GeometryCollection", "geometries": []}}}
+
+    x0 = min(pt[0] for pt in coords)
+    y0 = min(pt[1] for pt in coords)
+    kx = (max(pt[0] for pt in coords) - x0) / (quantization - 1) or 1
+    ky = (max(pt[1] for pt in coords) - y0) / (quantization - 1) or 1
+
+    junctions = find_junctions(features)
+    arcs, index = [], {}
+
+    def encode_arc(arc):
+        quantized = []
+        for x, y in arc:
+            q = (round((x - x0) / kx), round((y - y0) / ky))
+            if not quantized or q != quantized[-1]:
+                quantized.append(q)
+        if len(quantized) < 2:
+            quantized.append(quantized[0])
+        deltas = [list(quantized[0])]
+        deltas += [[b[0] - a[0], b[1] - a[1]] for a, b in zip(quantized, quantized[1:])]
+        return deltas
+
+    def arc_ref(arc):
+        key = tuple(arc)
+        canonical = min(key, key[::-1])
+        i = index.get(canonical)
+        if i is None:
+            i = index[canonical] = len(arcs)
+            arcs.append(encode_arc(canonical))
+        return i if canonical == key else ~i
+
+    geometries = []
+    for feat in features:
+        geometry = feat.get("geometry")
+        polygons = {}
+        for p, _, ring in _rings(geometry):
+            refs = [arc_ref(arc) for arc in _split_ring(_open_ring(ring), junctions)]
+            polygons.setdefault(p, []).append(refs)
+        props = feat.get("properties") or {}
+        if properties is not None:
+            props = {k: props[k] for k in properties if k in props}
+        entry = {"type": None, "properties": props}
+        if polygons:
+            polygon_arcs = [polygons[p] for p in sorted(polygons)]
+            if geometry["type"] == "Polygon":
+                entry.update(type="Polygon", arcs=polygon_arcs[0])
+            else:
+                entry.update(type="MultiPolygon", arcs=polygon_arcs)
+        geometries.append(entry)
+
+    return {
+        "type": "Topology",
+        "transform": {"scale": [kx, ky], "translate": [x0, y0]},
+        "arcs": arcs,
+        "objects": {OBJECT_NAME: {"type": "GeometryCollection", "geometries": geometries}},
+    }
+
+
+def dumps(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+with open(os.path.join(os.path.dirname(__file__), "topojson.js"), "r", encoding="utf-8") as f:
+    TOPOJSON_JS = f.read()